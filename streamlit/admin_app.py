@@ -3,11 +3,17 @@ Improved Admin Support Interface with Proper Polling and Enhanced Features
 """
 import streamlit as st
 import asyncio
+from collections import Counter
+import functools
+import heapq
+import json
 import nest_asyncio
 import sys
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Dict, Any, List
+import uuid
 import traceback
 from dotenv import load_dotenv
 
@@ -16,34 +22,53 @@ load_dotenv()
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from temporalio.client import Client
+from temporalio.api.batch.v1 import BatchOperationSignal
+from temporalio.api.common.v1 import Payloads
+from temporalio.api.workflowservice.v1 import StartBatchOperationRequest
 from temporal.data.base_models import MessageType, AgentType, TicketStatus
 from temporal.data.ticket_models import ChatMessage
+from temporal.data.search_attributes import TICKET_STATUS
 
 # Configuration
 TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
 TASK_QUEUE = os.getenv("TASK_QUEUE", "multi-agent-support")
 AUTO_REFRESH_INTERVAL = "3s"  # Streamlit fragment format (e.g., "3s", "1000ms")
+IDLE_REFRESH_INTERVAL = "10s"  # Used while no ticket is selected
+TEMPORAL_CLIENT_TTL = "30m"  # Recycle the shared Temporal client periodically
+CLIENT_HEALTH_CHECK_INTERVAL = 30  # Seconds between Temporal connection health checks
+TICKET_LIST_LIMIT = 50  # Maximum tickets fetched per refresh
+TICKET_PAGE_SIZE = 20  # Maximum ticket cards rendered per refresh
+CHAT_HISTORY_WINDOW = 30  # Most recent messages rendered per refresh
+OPTIMISTIC_STATUS_TTL = 15  # Seconds an admin action's status is shown before the workflow must confirm it
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop reused for every async call in this session"""
+    loop = st.session_state.get("_event_loop")
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        nest_asyncio.apply(loop)
+        st.session_state._event_loop = loop
+    return loop
 
 def run_async(coro):
     """Run async function synchronously"""
-    nest_asyncio.apply()
-    
-    try:
-        return asyncio.run(coro)
-    except RuntimeError as e:
-        if "cannot be called from a running event loop" in str(e):
-            loop = asyncio.new_event_loop()
-            try:
-                return loop.run_until_complete(coro)
-            finally:
-                loop.close()
-        else:
-            raise
+    return _get_event_loop().run_until_complete(coro)
 
 
-@st.cache_resource
+def _temporal_client_is_healthy(client: Client) -> bool:
+    """validate hook for get_temporal_client; health-checks the connection at most every interval"""
+    now = time.monotonic()
+    if now - st.session_state.get("_temporal_client_checked_at", 0.0) < CLIENT_HEALTH_CHECK_INTERVAL:
+        return True
+    st.session_state._temporal_client_checked_at = now
+    try:
+        return run_async(client.service_client.check_health(timeout=timedelta(seconds=2)))
+    except Exception:
+        return False
+
+@st.cache_resource(ttl=TEMPORAL_CLIENT_TTL, validate=_temporal_client_is_healthy, show_spinner=False)
 def get_temporal_client():
-    """Get cached Temporal client"""
+    """Get cached Temporal client, reconnected after TEMPORAL_CLIENT_TTL"""
     return run_async(Client.connect(TEMPORAL_ADDRESS))
 
 st.set_page_config(
@@ -52,8 +77,10 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Professional CSS
-st.markdown("""
+@st.cache_resource
+def _admin_css() -> str:
+    """Professional CSS, built once per process"""
+    return """
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
 
@@ -275,21 +302,35 @@ st.markdown("""
 
 footer {visibility: hidden;}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def _admin_header() -> str:
+    """Static dashboard header HTML"""
+    return """
+    <div class="admin-header">
+        <h1>Admin Support Dashboard</h1>
+        <p>Real-time Customer Support Management</p>
+    </div>
+    """
 
 # Core async functions
-async def list_active_workflows() -> List[Dict[str, Any]]:
-    """List all active workflow executions"""
+async def list_active_workflows(status_filter: Optional[str] = None, limit: int = TICKET_LIST_LIMIT) -> List[Dict[str, Any]]:
+    """List ticket workflow executions, optionally filtered by ticket status server-side"""
     try:
         client = get_temporal_client()
+        query = "WorkflowType='TicketWorkflow'"
+        if status_filter:
+            query += f" AND {TICKET_STATUS.name}='{status_filter}'"
+
         workflows = []
-        async for workflow in client.list_workflows("WorkflowType='TicketWorkflow'"):
+        async for workflow in client.list_workflows(query, page_size=limit):
             workflows.append({
                 'id': workflow.id,
-                'run_id': workflow.run_id,
-                'type': workflow.workflow_type,
                 'start_time': workflow.start_time
             })
+            if len(workflows) >= limit:
+                break
         return workflows
     except Exception as e:
         st.error(f"Failed to list workflows: {str(e)}")
@@ -310,6 +351,22 @@ async def get_ticket_details(workflow_id: str) -> Optional[Dict[str, Any]]:
             "error": str(e)
         }
 
+async def fetch_all_details(workflow_ids: List[str]) -> List[Any]:
+    """Query ticket details for several workflows concurrently"""
+    return await asyncio.gather(
+        *(get_ticket_details(workflow_id) for workflow_id in workflow_ids),
+        return_exceptions=True,
+    )
+
+@st.cache_data(ttl=AUTO_REFRESH_INTERVAL, max_entries=500, show_spinner=False)
+def cached_ticket_details(workflow_ids: tuple) -> List[Dict[str, Any]]:
+    """Ticket details shared across refreshes and admin sessions for one refresh interval"""
+    fetched = run_async(fetch_all_details(list(workflow_ids)))
+    return [
+        details for details in fetched
+        if details and not isinstance(details, BaseException)
+    ]
+
 async def send_admin_response(ticket_id: str, message: str, admin_name: str) -> bool:
     """Send admin response to a ticket"""
     try:
@@ -326,6 +383,7 @@ async def send_admin_response(ticket_id: str, message: str, admin_name: str) ->
         )
         
         await handle.signal("addMessage", chat_message.to_dict())
+        cached_ticket_details.clear()
         return True
     except Exception as e:
         st.error(f"Failed to send response: {str(e)}")
@@ -340,6 +398,7 @@ async def resolve_ticket(ticket_id: str, resolution_summary: str | None = None)
         handle = client.get_workflow_handle(ticket_id)
         
         await handle.signal("updateTicketStatus", "resolved")
+        cached_ticket_details.clear()
         return True
     except Exception as e:
         st.error(f"Failed to resolve ticket: {str(e)}")
@@ -354,20 +413,60 @@ async def close_ticket(ticket_id: str, close_reason: str | None = None) -> bool:
         handle = client.get_workflow_handle(ticket_id)
         
         await handle.signal("updateTicketStatus", "closed")
+        cached_ticket_details.clear()
         return True
     except Exception as e:
         st.error(f"Failed to close ticket: {str(e)}")
         return False
 
-def display_ticket_metrics(tickets: List[Dict[str, Any]], ticket_details: List[Dict[str, Any]]):
+async def batch_update_status(query: str, new_status: str) -> Optional[str]:
+    """Signal updateTicketStatus to every workflow matching a visibility query with one batch operation"""
+    try:
+        client = get_temporal_client()
+        job_id = f"ticket-status-{new_status}-{uuid.uuid4().hex[:8]}"
+        payloads = await client.data_converter.encode([new_status])
+
+        await client.workflow_service.start_batch_operation(StartBatchOperationRequest(
+            namespace=client.namespace,
+            job_id=job_id,
+            visibility_query=query,
+            reason=f"Admin {st.session_state.get('admin_name', 'Admin User')} set status to {new_status}",
+            signal_operation=BatchOperationSignal(
+                signal="updateTicketStatus",
+                input=Payloads(payloads=payloads),
+                identity=client.identity,
+            ),
+        ))
+        cached_ticket_details.clear()
+        return job_id
+    except Exception as e:
+        st.error(f"Failed to start batch status update: {str(e)}")
+        return None
+
+async def count_by_status(status: Optional[str] = None) -> int:
+    """Count ticket workflows via the visibility store, optionally for a single status"""
+    client = get_temporal_client()
+    query = "WorkflowType='TicketWorkflow'"
+    if status:
+        query += f" AND {TICKET_STATUS.name}='{status}'"
+    return (await client.count_workflows(query)).count
+
+async def fetch_ticket_counts() -> List[int]:
+    """Fetch the dashboard counters concurrently"""
+    return await asyncio.gather(
+        count_by_status(),
+        count_by_status(TicketStatus.ESCALATED_TO_HUMAN.value),
+        count_by_status(TicketStatus.IN_PROGRESS.value),
+        count_by_status(TicketStatus.RESOLVED.value),
+    )
+
+def display_ticket_metrics():
     """Display ticket metrics"""
-    def _status(detail: Dict[str, Any]) -> str:
-        return (detail.get('status') or '').lower() if detail else ''
-
-    total_tickets = len(tickets)
-    escalated_count = sum(1 for detail in ticket_details if _status(detail) == TicketStatus.ESCALATED_TO_HUMAN.value)
-    in_progress_count = sum(1 for detail in ticket_details if _status(detail) == TicketStatus.IN_PROGRESS.value)
-    resolved_count = sum(1 for detail in ticket_details if _status(detail) == TicketStatus.RESOLVED.value)
+    try:
+        total_tickets, escalated_count, in_progress_count, resolved_count = run_async(fetch_ticket_counts())
+    except Exception as e:
+        st.error(f"Failed to count tickets: {str(e)}")
+        return
 
     metric_definitions = [
         ("Total Tickets", total_tickets, "metric-total"),
@@ -391,7 +490,6 @@ def display_ticket_metrics(tickets: List[Dict[str, Any]], ticket_details: List[D
 
 def format_json_field(json_str, title, emoji):
     """Parse and format JSON string into readable text"""
-    import json
     try:
         data = json.loads(json_str) if isinstance(json_str, str) else json_str
         if isinstance(data, dict):
@@ -409,145 +507,211 @@ def format_json_field(json_str, title, emoji):
         # If parsing fails, return as-is
         return f"{emoji} {title}:\n{json_str}"
 
+def _yes_no(value, negative="❌ No"):
+    return '✅ Yes' if value else negative
+
+# Technical Specialist - actual fields: troubleshooting_steps, estimated_resolution_time
+def _format_technical_info(info):
+    content = []
+    if info.get('troubleshooting_steps'):
+        content.append(f"🔧 Troubleshooting Steps:\n{info['troubleshooting_steps']}")
+    if info.get('estimated_resolution_time'):
+        content.append(f"⏱️ Estimated Resolution Time: {info['estimated_resolution_time']}")
+    return content
+
+# Refund Specialist - actual fields: eligibility_assessment, required_documentation, processing_timeline
+def _format_refund_info(info):
+    content = []
+    if info.get('eligibility_assessment'):
+        content.append(f"✅ Eligibility Assessment:\n{info['eligibility_assessment']}")
+    if info.get('required_documentation'):
+        content.append(f"📄 Required Documentation:\n{info['required_documentation']}")
+    if info.get('processing_timeline'):
+        content.append(f"⏰ Processing Timeline: {info['processing_timeline']}")
+    return content
+
+# Order Specialist - actual fields: suggested_actions
+def _format_order_info(info):
+    return [f"📋 Suggested Actions:\n{info['suggested_actions']}"] if info.get('suggested_actions') else []
+
+# General Support - actual fields: suggested_actions
+def _format_general_info(info):
+    return [f"💡 Suggested Actions:\n{info['suggested_actions']}"] if info.get('suggested_actions') else []
+
+# Male/Female Specialist - actual fields: measurements_collected, measurements_data, validation_status
+def _format_measurement_info(info):
+    content = []
+    if info.get('measurements_collected') is not None:
+        content.append(f"📏 Measurements Collected: {_yes_no(info['measurements_collected'])}")
+    if info.get('measurements_data'):
+        content.append(format_json_field(info['measurements_data'], "Measurements", "📐"))
+    if info.get('validation_status'):
+        content.append(f"✔️ Validation Status: {info['validation_status']}")
+    return content
+
+# Billing Agent - actual fields: billing_complete, total_amount, payment_status, invoice_details
+def _format_billing_info(info):
+    content = []
+    if info.get('billing_complete') is not None:
+        content.append(f"💰 Billing Complete: {_yes_no(info['billing_complete'], '⏳ Pending')}")
+    if info.get('total_amount') is not None:
+        content.append(f"💵 Total Amount: ${info['total_amount']:.2f}")
+    if info.get('payment_status'):
+        content.append(f"💳 Payment Status: {info['payment_status']}")
+    if info.get('invoice_details'):
+        content.append(format_json_field(info['invoice_details'], "Invoice Details", "📄"))
+    return content
+
+# Delivery Agent - actual fields: delivery_scheduled, delivery_date, tracking_number, delivery_address
+def _format_delivery_info(info):
+    content = []
+    if info.get('delivery_scheduled') is not None:
+        content.append(f"🚚 Delivery Scheduled: {_yes_no(info['delivery_scheduled'], '⏳ Pending')}")
+    if info.get('delivery_date'):
+        content.append(f"📅 Delivery Date: {info['delivery_date']}")
+    if info.get('tracking_number'):
+        content.append(f"📦 Tracking Number: {info['tracking_number']}")
+    if info.get('delivery_address'):
+        content.append(f"📍 Delivery Address:\n{info['delivery_address']}")
+    return content
+
+# Alteration Agent - actual fields: alteration_needed, alteration_details, additional_cost
+def _format_alteration_info(info):
+    content = []
+    if info.get('alteration_needed') is not None:
+        content.append(f"✂️ Alteration Needed: {_yes_no(info['alteration_needed'])}")
+    if info.get('alteration_details'):
+        content.append(f"✂️ Alteration Details:\n{info['alteration_details']}")
+    if info.get('additional_cost') is not None:
+        content.append(f"💵 Additional Cost: ${info['additional_cost']:.2f}")
+    return content
+
+# Orchestrator
+def _format_orchestrator_info(info):
+    content = []
+    if info.get('synthesis_reasoning'):
+        content.append(f"🤖 Reasoning:\n{info['synthesis_reasoning']}")
+    if info.get('agents_used'):
+        content.append(f"👥 Agents Consulted: {', '.join(info['agents_used'])}")
+    return content
+
+# Matched as substrings of the lowercased agent type, in this order
+_AGENT_FORMATTERS: Dict[str, Callable[[Dict[str, Any]], List[str]]] = {
+    'technical': _format_technical_info,
+    'refund': _format_refund_info,
+    'order': _format_order_info,
+    'general': _format_general_info,
+    'male_specialist': _format_measurement_info,  # also matches female_specialist
+    'billing': _format_billing_info,
+    'delivery': _format_delivery_info,
+    'alteration': _format_alteration_info,
+    'orchestrator': _format_orchestrator_info,
+}
+_AGENT_KEYS = tuple(_AGENT_FORMATTERS)
+
 def format_additional_info_text(agent_type, additional_info):
     """Format additional information based on agent type as plain text"""
     if not additional_info:
         return ""
-    
-    content = []
+
     agent_type_str = str(agent_type).lower()
+    formatter = next((_AGENT_FORMATTERS[key] for key in _AGENT_KEYS if key in agent_type_str), None)
+    if formatter is None:
+        return ""
+
+    return "\n\n".join(formatter(additional_info))
+
+@functools.lru_cache(maxsize=4096)
+def _format_additional_info_cached(message_id, timestamp, agent_type, additional_info_json):
+    """Formatted additional info per message; chat messages never change once written"""
+    return format_additional_info_text(agent_type, json.loads(additional_info_json))
+
+def format_message_additional_info(message: Dict[str, Any]) -> str:
+    """Format a chat message's additional info, reusing the result across refreshes"""
+    additional_info = message.get('additional_info')
+    if not additional_info:
+        return ""
+    try:
+        additional_info_json = json.dumps(additional_info, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return format_additional_info_text(message.get('agent_type'), additional_info)
+    return _format_additional_info_cached(
+        message.get('id'),
+        message.get('timestamp'),
+        str(message.get('agent_type')),
+        additional_info_json,
+    )
+
+@functools.lru_cache(maxsize=8192)
+def format_message_time(timestamp_str: str) -> str:
+    """Format an ISO message timestamp as HH:MM"""
+    try:
+        return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')).strftime("%H:%M")
+    except Exception:
+        return "Time"
+
+def display_chat_message(message: Dict[str, Any]):
+    """Render a single chat message"""
+    timestamp_str = message.get('timestamp')
+    time_display = format_message_time(timestamp_str) if timestamp_str else "Time"
     
-    # Technical Specialist - actual fields: troubleshooting_steps, estimated_resolution_time
-    if 'technical' in agent_type_str:
-        if additional_info.get('troubleshooting_steps'):
-            content.append(f"🔧 Troubleshooting Steps:\n{additional_info['troubleshooting_steps']}")
-        if additional_info.get('estimated_resolution_time'):
-            content.append(f"⏱️ Estimated Resolution Time: {additional_info['estimated_resolution_time']}")
-    
-    # Refund Specialist - actual fields: eligibility_assessment, required_documentation, processing_timeline
-    elif 'refund' in agent_type_str:
-        if additional_info.get('eligibility_assessment'):
-            content.append(f"✅ Eligibility Assessment:\n{additional_info['eligibility_assessment']}")
-        if additional_info.get('required_documentation'):
-            content.append(f"📄 Required Documentation:\n{additional_info['required_documentation']}")
-        if additional_info.get('processing_timeline'):
-            content.append(f"⏰ Processing Timeline: {additional_info['processing_timeline']}")
-    
-    # Order Specialist - actual fields: suggested_actions
-    elif 'order' in agent_type_str:
-        if additional_info.get('suggested_actions'):
-            content.append(f"📋 Suggested Actions:\n{additional_info['suggested_actions']}")
-    
-    # General Support - actual fields: suggested_actions
-    elif 'general' in agent_type_str:
-        if additional_info.get('suggested_actions'):
-            content.append(f"💡 Suggested Actions:\n{additional_info['suggested_actions']}")
-    
-    # Male/Female Specialist - actual fields: measurements_collected, measurements_data, validation_status
-    elif 'male_specialist' in agent_type_str or 'female_specialist' in agent_type_str:
-        if additional_info.get('measurements_collected') is not None:
-            content.append(f"📏 Measurements Collected: {'✅ Yes' if additional_info['measurements_collected'] else '❌ No'}")
-        if additional_info.get('measurements_data'):
-            # Parse JSON measurements data
-            content.append(format_json_field(additional_info['measurements_data'], "Measurements", "📐"))
-        if additional_info.get('validation_status'):
-            content.append(f"✔️ Validation Status: {additional_info['validation_status']}")
-    
-    # Billing Agent - actual fields: billing_complete, total_amount, payment_status, invoice_details
-    elif 'billing' in agent_type_str:
-        if additional_info.get('billing_complete') is not None:
-            content.append(f"💰 Billing Complete: {'✅ Yes' if additional_info['billing_complete'] else '⏳ Pending'}")
-        if additional_info.get('total_amount') is not None:
-            content.append(f"💵 Total Amount: ${additional_info['total_amount']:.2f}")
-        if additional_info.get('payment_status'):
-            content.append(f"💳 Payment Status: {additional_info['payment_status']}")
-        if additional_info.get('invoice_details'):
-            # Parse JSON invoice details
-            content.append(format_json_field(additional_info['invoice_details'], "Invoice Details", "📄"))
-    
-    # Delivery Agent - actual fields: delivery_scheduled, delivery_date, tracking_number, delivery_address
-    elif 'delivery' in agent_type_str:
-        if additional_info.get('delivery_scheduled') is not None:
-            content.append(f"🚚 Delivery Scheduled: {'✅ Yes' if additional_info['delivery_scheduled'] else '⏳ Pending'}")
-        if additional_info.get('delivery_date'):
-            content.append(f"📅 Delivery Date: {additional_info['delivery_date']}")
-        if additional_info.get('tracking_number'):
-            content.append(f"📦 Tracking Number: {additional_info['tracking_number']}")
-        if additional_info.get('delivery_address'):
-            content.append(f"📍 Delivery Address:\n{additional_info['delivery_address']}")
+    content = message.get('content', 'No content')
+    message_type = message.get('message_type', 'UNKNOWN')
+    agent_type = message.get('agent_type')
+    additional_info = message.get('additional_info', {})
     
-    # Alteration Agent - actual fields: alteration_needed, alteration_details, additional_cost
-    elif 'alteration' in agent_type_str:
-        if additional_info.get('alteration_needed') is not None:
-            content.append(f"✂️ Alteration Needed: {'✅ Yes' if additional_info['alteration_needed'] else '❌ No'}")
-        if additional_info.get('alteration_details'):
-            content.append(f"✂️ Alteration Details:\n{additional_info['alteration_details']}")
-        if additional_info.get('additional_cost') is not None:
-            content.append(f"💵 Additional Cost: ${additional_info['additional_cost']:.2f}")
+    # Determine message type
+    is_customer = (
+        message_type == 'CUSTOMER' or 
+        message_type == 'customer' or 
+        str(message_type) == 'MessageType.CUSTOMER'
+    )
     
-    # Orchestrator
-    elif 'orchestrator' in agent_type_str:
-        if additional_info.get('synthesis_reasoning'):
-            content.append(f"🤖 Reasoning:\n{additional_info['synthesis_reasoning']}")
-        if additional_info.get('agents_used'):
-            content.append(f"👥 Agents Consulted: {', '.join(additional_info['agents_used'])}")
+    is_human_agent = (
+        message_type == 'HUMAN_AGENT' or
+        message_type == 'human_agent' or
+        str(message_type) == 'MessageType.HUMAN_AGENT'
+    )
     
-    return "\n\n".join(content) if content else ""
+    if is_customer:
+        with st.chat_message("user"):
+            st.write(f"**Customer** ({time_display})")
+            st.write(content)
+    elif is_human_agent:
+        with st.chat_message("assistant"):
+            st.write(f"**Admin Agent** ({time_display})")
+            st.write(content)
+    else:
+        # AI Agent
+        agent_name = get_agent_display_name(agent_type)
+        with st.chat_message("assistant"):
+            st.write(f"**{agent_name}** ({time_display})")
+            st.write(content)
+            
+            # Display additional structured information
+            if additional_info:
+                formatted_info = format_message_additional_info(message)
+                if formatted_info:
+                    st.info(formatted_info)
 
 def display_chat_interface(ticket_state: Dict[str, Any]):
     """Display chat interface using native Streamlit components"""
     st.markdown("### Ticket Conversation")
     
-    if ticket_state.get('chat_history'):
-        for message in ticket_state['chat_history']:
-            timestamp_str = message.get('timestamp')
-            if timestamp_str:
-                try:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                    time_display = timestamp.strftime("%H:%M")
-                except:
-                    time_display = "Time"
-            else:
-                time_display = "Time"
-            
-            content = message.get('content', 'No content')
-            message_type = message.get('message_type', 'UNKNOWN')
-            agent_type = message.get('agent_type')
-            additional_info = message.get('additional_info', {})
-            
-            # Determine message type
-            is_customer = (
-                message_type == 'CUSTOMER' or 
-                message_type == 'customer' or 
-                str(message_type) == 'MessageType.CUSTOMER'
+    chat_history = ticket_state.get('chat_history')
+    if chat_history:
+        # Only the most recent window is re-emitted on every refresh; older messages are opt-in
+        earlier_count = max(len(chat_history) - CHAT_HISTORY_WINDOW, 0)
+        if earlier_count:
+            show_earlier = st.toggle(
+                f"Show {earlier_count} earlier messages",
+                key=f"admin_show_earlier_{ticket_state.get('ticket_id')}",
             )
-            
-            is_human_agent = (
-                message_type == 'HUMAN_AGENT' or
-                message_type == 'human_agent' or
-                str(message_type) == 'MessageType.HUMAN_AGENT'
-            )
-            
-            if is_customer:
-                with st.chat_message("user"):
-                    st.write(f"**Customer** ({time_display})")
-                    st.write(content)
-            elif is_human_agent:
-                with st.chat_message("assistant"):
-                    st.write(f"**Admin Agent** ({time_display})")
-                    st.write(content)
-            else:
-                # AI Agent
-                agent_name = get_agent_display_name(agent_type)
-                with st.chat_message("assistant"):
-                    st.write(f"**{agent_name}** ({time_display})")
-                    st.write(content)
-                    
-                    # Display additional structured information
-                    if additional_info:
-                        formatted_info = format_additional_info_text(agent_type, additional_info)
-                        if formatted_info:
-                            st.info(formatted_info)
+            if not show_earlier:
+                chat_history = chat_history[earlier_count:]
+
+        for message in chat_history:
+            display_chat_message(message)
     else:
         st.info("No messages in this ticket yet.")
 
@@ -574,18 +738,70 @@ def get_agent_display_name(agent_type):
     return agent_names.get(str(agent_type), f"{str(agent_type).replace('_', ' ').title()}")
 
 
-@st.fragment(run_every=AUTO_REFRESH_INTERVAL)
+@functools.lru_cache(maxsize=1024)
+def ticket_card_html(ticket_id: str, customer_id: str, status: str, last_updated: str) -> str:
+    """Render the HTML for one ticket card in the live ticket list"""
+    status_class = status.lower().replace('_', '-') if status else 'unknown'
+    return f"""
+                    <div class="ticket-card {status_class}">
+                        <h4>Ticket #{ticket_id}</h4>
+                        <p><strong>Customer:</strong> {customer_id}</p>
+                        <p><strong>Status:</strong> <span class="status-badge status-{status_class}">{status.replace('_', ' ').title()}</span></p>
+                        <p><strong>Last Updated:</strong> {last_updated}</p>
+                    </div>
+                    """
+
+def set_session_value(key: str, value: Any) -> None:
+    """Write a session_state value only when it actually changes"""
+    if st.session_state.get(key) != value:
+        st.session_state[key] = value
+
+def set_optimistic_status(ticket_id: str, status: str, previous_status: str) -> None:
+    """Show status for ticket_id right away, while its workflow still reports previous_status"""
+    st.session_state.setdefault('_optimistic_status', {})[ticket_id] = (status, previous_status.lower(), time.monotonic())
+
+def apply_optimistic_status(ticket_details: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Overlay statuses set by admin actions until the workflows report them.
+
+    An entry is dropped once the workflow reports anything but the status it had before
+    the action (the new status, or a change made elsewhere), once the ticket leaves the
+    list, or after OPTIMISTIC_STATUS_TTL seconds, so a lost signal can't mask the real status.
+    """
+    pending = st.session_state.setdefault('_optimistic_status', {})
+    if not pending:
+        return ticket_details
+
+    now = time.monotonic()
+    listed = {detail.get('ticket_id') for detail in ticket_details}
+    for ticket_id, (_, _, set_at) in list(pending.items()):
+        if ticket_id not in listed or now - set_at > OPTIMISTIC_STATUS_TTL:
+            pending.pop(ticket_id)
+
+    overlaid = []
+    for detail in ticket_details:
+        entry = pending.get(detail.get('ticket_id'))
+        if entry is None:
+            overlaid.append(detail)
+        elif (detail.get('status') or '').lower() != entry[1]:
+            pending.pop(detail.get('ticket_id'))
+            overlaid.append(detail)
+        else:
+            overlaid.append({**detail, 'status': entry[0]})
+    return overlaid
+
 def display_dashboard_content():
-    """Auto-refreshing dashboard content using Streamlit fragments"""
+    """Dashboard content, rerun on its own by the fragment chosen in get_dashboard_refresh_interval"""
+    status_filter = st.session_state.get("admin_status_filter", "All statuses")
+    status_match = None if status_filter == "All statuses" else status_filter.lower().replace(' ', '_')
+
     with st.spinner("Loading tickets..."):
-        tickets = run_async(list_active_workflows())
+        tickets = run_async(list_active_workflows(status_match))
         ticket_details: List[Dict[str, Any]] = []
 
         if tickets:
-            for ticket in tickets:
-                details = run_async(get_ticket_details(ticket['id']))
-                if details:
-                    ticket_details.append(details)
+            ticket_details = cached_ticket_details(tuple(ticket['id'] for ticket in tickets))
+        ticket_details = apply_optimistic_status(ticket_details)
+        details_by_id = {detail.get('ticket_id'): detail for detail in ticket_details}
 
     # Main content
     tab1, tab2 = st.tabs(["Live Tickets", "Analytics"])
@@ -594,7 +810,7 @@ def display_dashboard_content():
         
         # Display metrics
         if tickets:
-            display_ticket_metrics(tickets, ticket_details)
+            display_ticket_metrics()
             st.markdown("""<div style="margin: 0.25rem 0 1rem 0; text-align: center; color: #6b7280;">
                 Use the controls below to focus on the conversations that need your attention.
             </div>""", unsafe_allow_html=True)
@@ -602,8 +818,7 @@ def display_dashboard_content():
             # Ticket list
             st.markdown("### Active Tickets")
 
-            unique_statuses = sorted({(detail.get('status') or 'Unknown').replace('_', ' ').title() for detail in ticket_details})
-            filter_options = ["All statuses"] + unique_statuses
+            filter_options = ["All statuses"] + [status.value.replace('_', ' ').title() for status in TicketStatus]
             if 'admin_status_filter' not in st.session_state:
                 st.session_state.admin_status_filter = "All statuses"
 
@@ -613,14 +828,11 @@ def display_dashboard_content():
                 key="admin_status_filter"
             )
             
-            # Filter and sort tickets
-            sorted_tickets = sorted(ticket_details, 
-                                  key=lambda x: x.get('last_updated', ''), 
-                                  reverse=True)
-
-            if status_filter != "All statuses":
-                status_match = status_filter.lower().replace(' ', '_')
-                sorted_tickets = [ticket for ticket in sorted_tickets if (ticket.get('status') or '').lower() == status_match]
+            # Filter, then keep only the most recently updated page of tickets
+            filtered_tickets = ticket_details if not status_match else [
+                ticket for ticket in ticket_details if (ticket.get('status') or '').lower() == status_match
+            ]
+            sorted_tickets = heapq.nlargest(TICKET_PAGE_SIZE, filtered_tickets, key=lambda x: x.get('last_updated', ''))
             
             for ticket_detail in sorted_tickets:
                 if not ticket_detail:
@@ -631,38 +843,28 @@ def display_dashboard_content():
                 customer_id = ticket_detail.get('customer_id', 'Unknown')
                 last_updated = ticket_detail.get('last_updated', '')
                 
-                # Create ticket card
-                status_class = status.lower().replace('_', '-') if status else 'unknown'
-                
                 # Use columns for ticket selection
                 col1, col2 = st.columns([4, 1])
                 
                 with col1:
-                    st.markdown(f"""
-                    <div class="ticket-card {status_class}">
-                        <h4>Ticket #{ticket_id}</h4>
-                        <p><strong>Customer:</strong> {customer_id}</p>
-                        <p><strong>Status:</strong> <span class="status-badge status-{status_class}">{status.replace('_', ' ').title()}</span></p>
-                        <p><strong>Last Updated:</strong> {last_updated}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(ticket_card_html(ticket_id, customer_id, status, last_updated), unsafe_allow_html=True)
                 
                 with col2:
                     if st.button("Select", key=f"select_{ticket_id}"):
                         st.session_state.selected_ticket_id = ticket_id
                         st.session_state.admin_ticket_status = status.upper() if isinstance(status, str) else status
-                        st.rerun(scope="fragment")
+                        st.rerun()
             
             # Selected ticket details
             if st.session_state.selected_ticket_id:
                 st.divider()
                 ticket_id = st.session_state.selected_ticket_id
-                ticket_state = run_async(get_ticket_details(ticket_id))
+                ticket_state = details_by_id.get(ticket_id) or next(iter(cached_ticket_details((ticket_id,))), None)
                 if not ticket_state:
                     st.warning("Ticket data is no longer available. It may have completed.")
                     st.session_state.selected_ticket_id = None
                     st.session_state.admin_ticket_status = None
-                    st.rerun(scope="fragment")
+                    st.rerun()
                     return
                 
                 st.markdown(f"### Ticket Details: #{ticket_id}")
@@ -672,7 +874,7 @@ def display_dashboard_content():
                 
                 # Admin response interface
                 status = ticket_state.get('status', '').upper()
-                st.session_state.admin_ticket_status = status
+                set_session_value('admin_ticket_status', status)
                 if status not in ['CLOSED', 'RESOLVED']:
                     st.markdown("### Admin Actions")
 
@@ -699,22 +901,24 @@ def display_dashboard_content():
                             with st.spinner("Resolving ticket..."):
                                 if run_async(resolve_ticket(ticket_id)):
                                     st.success("Ticket resolved!")
+                                    set_optimistic_status(ticket_id, TicketStatus.RESOLVED.value, status)
                                     st.session_state.selected_ticket_id = None
                                     st.session_state.admin_ticket_status = None
-                                    st.rerun(scope="fragment")
+                                    return
 
                     with action_col2:
                         if st.button("Close Ticket", use_container_width=True, key=f"admin_close_{ticket_id}"):
                             with st.spinner("Closing ticket..."):
                                 if run_async(close_ticket(ticket_id)):
                                     st.success("Ticket closed!")
+                                    set_optimistic_status(ticket_id, TicketStatus.CLOSED.value, status)
                                     st.session_state.selected_ticket_id = None
                                     st.session_state.admin_ticket_status = None
-                                    st.rerun(scope="fragment")
+                                    return
                 else:
                     st.info(f"This ticket is {status.lower()} and cannot be modified.")
             else:
-                st.session_state.admin_ticket_status = None
+                set_session_value('admin_ticket_status', None)
         else:
             st.info("No active tickets found. Tickets will appear here when customers create them.")
     
@@ -722,15 +926,24 @@ def display_dashboard_content():
         st.header("Analytics Dashboard")
         st.caption("These insights refresh automatically alongside the live ticket feed.")
 
+        if status_match and status_match not in (TicketStatus.RESOLVED.value, TicketStatus.CLOSED.value):
+            with st.popover(f"Resolve all {status_filter.lower()} tickets"):
+                st.warning(f"Every running {status_filter.lower()} ticket will be marked resolved. This cannot be undone.")
+                if st.button("Confirm batch resolve", key="admin_batch_resolve", type="primary"):
+                    batch_query = (
+                        f"WorkflowType='TicketWorkflow' AND ExecutionStatus='Running'"
+                        f" AND {TICKET_STATUS.name}='{status_match}'"
+                    )
+                    job_id = run_async(batch_update_status(batch_query, TicketStatus.RESOLVED.value))
+                    if job_id:
+                        st.success(f"Batch resolve started (job {job_id}).")
+
         if ticket_details:
             # Status distribution
-            status_counts = {}
-            for ticket in ticket_details:
-                status = ticket.get('status', 'Unknown')
-                status_counts[status] = status_counts.get(status, 0) + 1
+            status_counts = Counter((ticket.get('status') or 'Unknown') for ticket in ticket_details)
             
             st.markdown("### Ticket Status Distribution")
-            for status, count in status_counts.items():
+            for status, count in status_counts.most_common():
                 st.metric(status.replace('_', ' ').title(), count)
             
             # Recent activity
@@ -745,15 +958,32 @@ def display_dashboard_content():
             st.info("No data available for analytics.")
 
 
+def get_dashboard_refresh_interval() -> Optional[str]:
+    """Pick the refresh interval for the current view; None disables auto-refresh"""
+    if st.session_state.get("admin_refresh_paused"):
+        return None
+    if st.session_state.get("selected_ticket_id"):
+        return AUTO_REFRESH_INTERVAL
+    return IDLE_REFRESH_INTERVAL
+
+# One fragment per refresh interval, all rendering the same dashboard content
+DASHBOARD_FRAGMENTS = {
+    interval: st.fragment(run_every=interval)(display_dashboard_content)
+    for interval in (None, AUTO_REFRESH_INTERVAL, IDLE_REFRESH_INTERVAL)
+}
+
 def main():
-    # Header
-    st.markdown("""
-    <div class="admin-header">
-        <h1>Admin Support Dashboard</h1>
-        <p>Real-time Customer Support Management</p>
-    </div>
-    """, unsafe_allow_html=True)
-    st.caption(f"Dashboard refreshes automatically every {AUTO_REFRESH_INTERVAL}. Responses and status changes apply instantly.")
+    # Connect before the first dashboard paint so the fragment doesn't pay for it
+    get_temporal_client()
+
+    # Static styling and header, rendered outside the auto-refreshing fragment
+    st.markdown(_admin_css(), unsafe_allow_html=True)
+    st.markdown(_admin_header(), unsafe_allow_html=True)
+    refresh_interval = get_dashboard_refresh_interval()
+    if refresh_interval:
+        st.caption(f"Dashboard refreshes automatically every {refresh_interval}. Responses and status changes apply instantly.")
+    else:
+        st.caption("Auto-refresh is paused. Interact with the dashboard or resume it from the sidebar to load new data.")
     
     # Initialize session state
     if 'selected_ticket_id' not in st.session_state:
@@ -773,10 +1003,11 @@ def main():
         )
         
         st.divider()
-        st.caption("Ticket list updates continuously; no manual refresh needed.")
+        st.toggle("Pause auto-refresh", key="admin_refresh_paused")
+        st.caption(f"Refreshes every {AUTO_REFRESH_INTERVAL} while a ticket is open and every {IDLE_REFRESH_INTERVAL} otherwise.")
 
     # Display auto-refreshing dashboard content
-    display_dashboard_content()
+    DASHBOARD_FRAGMENTS[refresh_interval]()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
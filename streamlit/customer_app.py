@@ -3,12 +3,15 @@ Improved Customer Support Interface with Proper Polling and Ticket Management
 """
 import streamlit as st
 import asyncio
-import nest_asyncio
-import uuid
+import functools
+import json
+import logging
+import threading
+from secrets import token_hex
 import sys
 import os
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,37 +20,55 @@ load_dotenv()
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from temporalio.client import Client
+try:
+    import uvloop  # Optional: faster event loop for the background Temporal thread
+except ImportError:
+    uvloop = None
+
+from temporalio.client import Client, WorkflowHandle
+from temporalio.common import SearchAttributePair, TypedSearchAttributes
 from temporal.data.base_models import MessageType, AgentType, TicketStatus
 from temporal.data.ticket_models import ChatMessage, WorkflowPayload
 from temporal.data.persistent_data import get_customers
+from temporal.data.search_attributes import CUSTOMER_ID
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("CUSTOMER_APP_LOG_LEVEL", "WARNING"))
 
 # Configuration
 TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
 TASK_QUEUE = os.getenv("TASK_QUEUE", "multi-agent-support")
+GEMINI_CACHE_WARMUP = os.getenv("GEMINI_CACHE_WARMUP", "false").lower() in ("1", "true", "yes")
 AUTO_REFRESH_INTERVAL = "2s"  # Streamlit fragment format (e.g., "2s", "1000ms")
+CHAT_HISTORY_WINDOW = 30  # Most recent messages rendered per rerun
+TEMPORAL_CLIENT_TTL = "1h"  # Recycle the shared Temporal client periodically
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Long-lived event loop running on a background thread, shared by all sessions"""
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="temporal-event-loop", daemon=True).start()
+    return loop
 
 def run_async(coro):
-    """Run async function synchronously - Streamlit compatible"""
-    nest_asyncio.apply()
-    
-    try:
-        return asyncio.run(coro)
-    except RuntimeError as e:
-        if "cannot be called from a running event loop" in str(e):
-            loop = asyncio.new_event_loop()
-            try:
-                return loop.run_until_complete(coro)
-            finally:
-                loop.close()
-        else:
-            raise
+    """Run async function synchronously on the shared background event loop"""
+    # (Re)connect here, on the caller's thread: a connect triggered from a coroutine on the loop thread would deadlock
+    get_temporal_client()
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
 
 
-@st.cache_resource
+@st.cache_resource(ttl=TEMPORAL_CLIENT_TTL, show_spinner=False)
 def get_temporal_client():
-    """Get cached Temporal client"""
-    return run_async(Client.connect(TEMPORAL_ADDRESS))
+    """Get cached Temporal client, reconnected after TEMPORAL_CLIENT_TTL"""
+    return asyncio.run_coroutine_threadsafe(Client.connect(TEMPORAL_ADDRESS), get_event_loop()).result()
+
+@functools.lru_cache(maxsize=512)
+def _workflow_handle(client: Client, workflow_id: str) -> WorkflowHandle:
+    return client.get_workflow_handle(workflow_id)
+
+def get_ticket_handle(ticket_id: str) -> WorkflowHandle:
+    """Get a reusable workflow handle for a ticket on the current Temporal client"""
+    return _workflow_handle(get_temporal_client(), ticket_id)
 
 st.set_page_config(
     page_title="Customer Support Portal",
@@ -55,253 +76,59 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Clean Professional CSS
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-
-.stApp {
-    background-color: #f8fafc;
-    font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-}
-
-.main .block-container {
-    max-width: 1200px;
-    padding-top: 2rem;
-}
-
-.main-header {
-    background: #ffffff;
-    color: #1f2937;
-    padding: 2rem;
-    border-radius: 12px;
-    margin-bottom: 2rem;
-    text-align: center;
-    border: 1px solid #e5e7eb;
-    box-shadow: 0 1px 3px 0 rgba(0, 0, 0, 0.1);
-}
-
-.main-header h1 {
-    color: #1f2937;
-    font-weight: 700;
-    margin: 0;
-    font-size: 2rem;
-}
-
-.main-header p {
-    color: #6b7280;
-    margin: 0.5rem 0 0 0;
-    font-size: 1rem;
-}
-
-.chat-container {
-    max-height: 500px;
-    overflow-y: auto;
-    padding: 1.5rem;
-    border-radius: 12px;
-    background: #ffffff;
-    margin: 1rem 0;
-    border: 1px solid #e5e7eb;
-}
-
-.chat-container::-webkit-scrollbar {
-    width: 8px;
-}
-
-.chat-container::-webkit-scrollbar-track {
-    background: #f9fafb;
-    border-radius: 4px;
-}
-
-.chat-container::-webkit-scrollbar-thumb {
-    background: #d1d5db;
-    border-radius: 4px;
-}
-
-.message-wrapper {
-    display: flex;
-    margin: 1.25rem 0;
-}
-
-.message-wrapper.user {
-    justify-content: flex-end;
-}
-
-.message-wrapper.agent {
-    justify-content: flex-start;
-}
-
-.message-wrapper.system {
-    justify-content: center;
-}
-
-.chat-message {
-    max-width: 75%;
-    padding: 0.875rem 1.125rem;
-    border-radius: 12px;
-    line-height: 1.5;
-    word-wrap: break-word;
-}
-
-.user-message {
-    background: #2563eb;
-    color: white;
-}
-
-.agent-message {
-    background: #f3f4f6;
-    color: #1f2937;
-    border: 1px solid #e5e7eb;
-}
-
-.system-message {
-    background: #fef3c7;
-    color: #92400e;
-    text-align: center;
-    font-style: italic;
-    border-radius: 8px;
-    max-width: 80%;
-    border: 1px solid #fcd34d;
-}
-
-.message-meta {
-    font-size: 0.8125rem;
-    color: #6b7280;
-    margin-bottom: 0.5rem;
-    font-weight: 500;
-}
-
-.user-message .message-meta {
-    color: rgba(255, 255, 255, 0.9);
-}
-
-.additional-info {
-    margin-top: 0.75rem;
-    padding: 0.875rem;
-    background: rgba(255, 255, 255, 0.5);
-    border-radius: 8px;
-    border-left: 3px solid #3b82f6;
-    font-size: 0.9rem;
-}
-
-.status-badge {
-    display: inline-block;
-    padding: 0.375rem 0.75rem;
-    border-radius: 6px;
-    font-size: 0.8125rem;
-    font-weight: 600;
-    text-transform: uppercase;
-    margin: 0.25rem;
-}
-
-.status-open { 
-    background: #dcfce7;
-    color: #166534;
-}
-
-.status-in-progress { 
-    background: #dbeafe;
-    color: #1e40af;
-}
-
-.status-resolved { 
-    background: #f3f4f6;
-    color: #374151;
-}
-
-.status-escalated-to-human { 
-    background: #fee2e2;
-    color: #991b1b;
-}
-
-.status-closed {
-    background: #f3f4f6;
-    color: #374151;
-}
-
-.ticket-header {
-    background: transparent;
-    color: #1f2937;
-    padding: 1rem 0;
-    margin-bottom: 1rem;
-    border-bottom: 2px solid #e5e7eb;
-}
-
-.ticket-header h3 {
-    color: #1f2937;
-    margin: 0;
-    font-size: 1.5rem;
-    font-weight: 600;
-}
-
-.ticket-header p {
-    color: #6b7280;
-    margin: 0.5rem 0 0 0;
-    font-size: 0.9375rem;
-}
-
-.info-card {
-    background: #ffffff;
-    padding: 1.25rem;
-    border-radius: 8px;
-    margin: 1rem 0;
-    border: 1px solid #e5e7eb;
-    box-shadow: 0 1px 2px 0 rgba(0, 0, 0, 0.05);
-}
+# Clean Professional CSS, kept in customer_styles.css next to this file
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "customer_styles.css")
 
-.stButton > button {
-    border-radius: 8px;
-    border: none;
-    font-weight: 600;
-    padding: 0.625rem 1.25rem;
-    font-size: 0.9375rem;
-    box-shadow: 0 1px 2px 0 rgba(0, 0, 0, 0.05);
-}
+@st.cache_data(ttl="5m", show_spinner=False)
+def cached_customers() -> Dict[str, Any]:
+    """Customer profiles from persistent storage, re-read at most every five minutes"""
+    return get_customers()
 
-.ticket-action-buttons {
-    display: flex;
-    gap: 0.5rem;
-    margin-top: 1rem;
-}
+@st.cache_data(show_spinner=False)
+def load_css() -> str:
+    """Read the portal stylesheet once per process"""
+    with open(CSS_PATH, encoding="utf-8") as css_file:
+        return f"<style>\n{css_file.read()}</style>"
 
-footer {visibility: hidden;}
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Core functions
-async def create_new_ticket(customer_id: str, initial_message: str, customer_profile: Dict[str, Any]) -> Optional[str]:
-    """Create a new support ticket workflow"""
+# These run on the background loop thread, where Streamlit calls have no script context and are
+# silently dropped; they return the error for the caller to display instead
+async def create_new_ticket(customer_id: str, initial_message: str, customer_profile: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Create a new support ticket workflow; returns (ticket_id, error)"""
     try:
         client = get_temporal_client()
-        ticket_id = f"ticket-{uuid.uuid4().hex[:8]}"
+        ticket_id = f"ticket-{token_hex(4)}"
         
         payload = WorkflowPayload(
             ticket_id=ticket_id,
             customer_id=customer_id,
             initial_message=initial_message,
-            customer_profile=customer_profile
+            customer_profile=customer_profile,
+            warm_up_agent_caches=GEMINI_CACHE_WARMUP
         )
         
         await client.start_workflow(
             "TicketWorkflow",
             payload,
             id=ticket_id,
-            task_queue=TASK_QUEUE
+            task_queue=TASK_QUEUE,
+            search_attributes=TypedSearchAttributes([SearchAttributePair(CUSTOMER_ID, customer_id)]),
         )
+        cached_customer_tickets.clear()
         
-        return ticket_id
+        return ticket_id, None
     except Exception as e:
-        st.error(f"Failed to create ticket: {str(e)}")
-        return None
+        return None, f"Failed to create ticket: {str(e)}"
 
-async def send_message_to_ticket(ticket_id: str, message: str, customer_id: str) -> bool:
-    """Send a new message to an existing ticket"""
+async def send_message_to_ticket(ticket_id: str, message: str, customer_id: str) -> Optional[str]:
+    """Send a new message to an existing ticket; returns the error, or None on success"""
     try:
-        client = get_temporal_client()
-        handle = client.get_workflow_handle(ticket_id)
+        handle = get_ticket_handle(ticket_id)
         
         chat_message = ChatMessage(
-            id=f"msg-{uuid.uuid4().hex[:8]}",
+            id=f"msg-{token_hex(4)}",
             ticket_id=ticket_id,
             content=message,
             message_type=MessageType.CUSTOMER,
@@ -310,77 +137,150 @@ async def send_message_to_ticket(ticket_id: str, message: str, customer_id: str)
         )
         
         await handle.signal("addMessage", chat_message.to_dict())
-        return True
+        return None
     except Exception as e:
-        st.error(f"Failed to send message: {str(e)}")
-        return False
+        return f"Failed to send message: {str(e)}"
 
-async def get_ticket_state(ticket_id: str) -> Optional[Dict[str, Any]]:
-    """Get current state of a ticket"""
+
+async def get_ticket_state_since(ticket_id: str, message_count: int) -> Optional[Dict[str, Any]]:
+    """Get current state of a ticket with only the messages after the first message_count"""
     try:
-        client = get_temporal_client()
-        handle = client.get_workflow_handle(ticket_id)
-        state = await handle.query("getState")
-        return state
-    except Exception as e:
-        print(f"Error getting ticket state: {e}")
+        handle = get_ticket_handle(ticket_id)
+        return await handle.query("getStateSince", message_count)
+    except Exception:
+        logger.debug("Error getting ticket state for %s", ticket_id, exc_info=True)
+        return None
+
+@st.cache_data(ttl="1s", show_spinner=False)
+def cached_ticket_state_since(ticket_id: str, message_count: int) -> Optional[Dict[str, Any]]:
+    """Share getStateSince results between sessions polling the same ticket"""
+    return run_async(get_ticket_state_since(ticket_id, message_count))
+
+def ticket_ui(ticket_id: str) -> Dict[str, Any]:
+    """Per-ticket view state, grouped under one session_state entry"""
+    return st.session_state.setdefault("ticket_ui", {}).setdefault(ticket_id, {})
+
+def load_ticket_state(ticket_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch new messages since the last rerun and merge them into this session's copy of the chat"""
+    ui = ticket_ui(ticket_id)
+    if "final_state" in ui:
+        return ui["final_state"]
+
+    chat_history = ui.get("chat_history", [])
+
+    state = ui.pop("prefetched_state", None)
+    if not state:
+        state = cached_ticket_state_since(ticket_id, len(chat_history))
+    if not state:
         return None
 
+    chat_history = chat_history + state.pop('new_messages', [])
+    if len(chat_history) != state.get('message_count'):
+        # Local copy is out of step with the workflow; start over from the full history
+        ui.pop("chat_history", None)
+        return load_ticket_state(ticket_id)
+
+    ui["chat_history"] = chat_history
+    state['chat_history'] = chat_history
+
+    # Closed and resolved tickets no longer change; stop querying (and replaying) the finished workflow
+    if state.get('status') in (TicketStatus.CLOSED.value, TicketStatus.RESOLVED.value):
+        ui["final_state"] = state
+    return state
+
+async def fetch_customer_view(customer_id: str, ticket_id: str, message_count: int):
+    """Fetch a customer's tickets and the open ticket's new state concurrently"""
+    return await asyncio.gather(
+        list_customer_tickets(customer_id),
+        get_ticket_state_since(ticket_id, message_count),
+    )
+
+def load_customer_tickets(customer_id: str, ticket_id: Optional[str]) -> List[Dict[str, Any]]:
+    """List the customer's tickets, prefetching the open ticket's state in the same round trip"""
+    if not ticket_id or ticket_id == "__NEW__" or "final_state" in ticket_ui(ticket_id):
+        return cached_customer_tickets(customer_id)
+
+    ui = ticket_ui(ticket_id)
+    tickets, ui["prefetched_state"] = run_async(fetch_customer_view(customer_id, ticket_id, len(ui.get("chat_history", []))))
+    return tickets
 
 async def list_customer_tickets(customer_id: str) -> List[Dict[str, Any]]:
-    """Return all active tickets for a customer."""
+    """Return all tickets for a customer."""
     client = get_temporal_client()
     tickets: List[Dict[str, Any]] = []
 
     try:
-        async for workflow in client.list_workflows("WorkflowType='TicketWorkflow'"):
-            handle = client.get_workflow_handle(workflow.id)
-            try:
-                state = await handle.query("getState")
-            except Exception:
-                continue
-
-            if not state:
-                continue
+        query = f"WorkflowType='TicketWorkflow' AND {CUSTOMER_ID.name}='{customer_id}'"
+        workflow_ids = [workflow.id async for workflow in client.list_workflows(query)]
+        summaries = await asyncio.gather(
+            *(get_ticket_handle(workflow_id).query("getSummary") for workflow_id in workflow_ids),
+            return_exceptions=True,
+        )
 
-            if state.get("customer_id") != customer_id:
+        for summary in summaries:
+            if not summary or isinstance(summary, BaseException):
                 continue
 
             tickets.append({
-                "ticket_id": state.get("ticket_id"),
-                "status": state.get("status"),
-                "last_updated": state.get("last_updated"),
+                "ticket_id": summary.get("ticket_id"),
+                "status": summary.get("status"),
+                "last_updated": summary.get("last_updated"),
             })
 
-    except Exception as exc:
-        print(f"Error listing customer tickets: {exc}")
+    except Exception:
+        logger.warning("Error listing tickets for customer %s", customer_id, exc_info=True)
 
     tickets.sort(key=lambda item: item.get("last_updated") or "", reverse=True)
     return tickets
 
-async def close_ticket_by_customer(ticket_id: str, customer_id: str) -> bool:
-    """Allow customer to close their own ticket without posting to chat."""
+@st.cache_data(ttl="5s", show_spinner=False)
+def cached_customer_tickets(customer_id: str) -> List[Dict[str, Any]]:
+    """Customer tickets shared by the sidebar and the overview within one rerun"""
+    return run_async(list_customer_tickets(customer_id))
+
+async def close_ticket_by_customer(ticket_id: str, customer_id: str) -> Optional[str]:
+    """Allow customer to close their own ticket without posting to chat; returns the error, or None on success."""
     try:
-        client = get_temporal_client()
-        handle = client.get_workflow_handle(ticket_id)
+        handle = get_ticket_handle(ticket_id)
         
         await handle.signal("updateTicketStatus", "closed")
-        return True
+        cached_customer_tickets.clear()
+        return None
     except Exception as e:
-        st.error(f"Failed to close ticket: {str(e)}")
-        return False
+        return f"Failed to close ticket: {str(e)}"
 
-async def mark_ticket_resolved(ticket_id: str, customer_id: str) -> bool:
-    """Allow customer to mark ticket as resolved without adding chat messages."""
+async def mark_ticket_resolved(ticket_id: str, customer_id: str) -> Optional[str]:
+    """Allow customer to mark ticket as resolved without adding chat messages; returns the error, or None on success."""
     try:
-        client = get_temporal_client()
-        handle = client.get_workflow_handle(ticket_id)
+        handle = get_ticket_handle(ticket_id)
         
         await handle.signal("updateTicketStatus", "resolved")
-        return True
+        cached_customer_tickets.clear()
+        return None
     except Exception as e:
-        st.error(f"Failed to resolve ticket: {str(e)}")
-        return False
+        return f"Failed to resolve ticket: {str(e)}"
+
+@st.cache_data(max_entries=5000, show_spinner=False)
+def prepare_chat_message(message_id: str, message_json: str) -> Tuple[bool, str, str, str]:
+    """Turn a chat message into (is_customer, agent_name, content, formatted_info) for display"""
+    message = json.loads(message_json)
+    content = message.get('content', 'No content')
+    message_type = message.get('message_type', 'UNKNOWN')
+    agent_type = message.get('agent_type')
+    additional_info = message.get('additional_info', {})
+    
+    # Check if customer message
+    is_customer = (
+        message_type == 'CUSTOMER' or 
+        message_type == 'customer' or 
+        str(message_type) == 'MessageType.CUSTOMER'
+    )
+    
+    if is_customer:
+        return True, "", content, ""
+    
+    formatted_info = format_additional_info_text(agent_type, additional_info) if additional_info else ""
+    return False, get_agent_display_name(agent_type), content, formatted_info
 
 def display_chat_history(chat_history: list, pending_questions: dict, ticket_id: str):
     """Display chat history with enhanced formatting and inline pending questions"""
@@ -388,73 +288,66 @@ def display_chat_history(chat_history: list, pending_questions: dict, ticket_id:
         st.info("AI agents are analyzing your request...")
         return
     
+    # Only the most recent window is re-emitted on every rerun; older messages are opt-in
+    earlier_count = max(len(chat_history) - CHAT_HISTORY_WINDOW, 0)
+    if earlier_count and not st.toggle(f"Show {earlier_count} earlier messages", key=f"show_earlier_{ticket_id}"):
+        chat_history = chat_history[earlier_count:]
+    
     for message in chat_history:
-        timestamp_str = message.get('timestamp')
-        if timestamp_str:
-            try:
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                time_display = timestamp.strftime("%H:%M")
-            except:
-                time_display = "Time"
-        else:
-            time_display = "Time"
-        
-        content = message.get('content', 'No content')
-        message_type = message.get('message_type', 'UNKNOWN')
-        agent_type = message.get('agent_type')
-        additional_info = message.get('additional_info', {})
-        metadata = message.get('metadata', {})
-        
-        # Check if customer message
-        is_customer = (
-            message_type == 'CUSTOMER' or 
-            message_type == 'customer' or 
-            str(message_type) == 'MessageType.CUSTOMER' or 
-            (hasattr(message_type, 'value') and message_type.value == 'customer')
+        # Messages are append-only, so the prepared display values are cached per message
+        is_customer, agent_name, content, formatted_info = prepare_chat_message(
+            message.get('id'), json.dumps(message, sort_keys=True, default=str)
         )
         
         if is_customer:
             with st.chat_message("user"):
                 st.write(content)
         else:
-            agent_name = get_agent_display_name(agent_type)
             with st.chat_message("assistant"):
                 st.write(f"**{agent_name}**")
                 st.write(content)
                 
                 # Display additional structured information
-                if additional_info:
-                    formatted_info = format_additional_info_text(agent_type, additional_info)
-                    if formatted_info:
-                        st.info(formatted_info)
+                if formatted_info:
+                    st.info(formatted_info)
+
+_AGENT_NAMES = {
+    'INTENT_CLASSIFIER': "Intent Analyzer",
+    'ORCHESTRATOR': "Orchestrator",
+    'ORDER_SPECIALIST': "Order Specialist",
+    'TECHNICAL_SPECIALIST': "Technical Support",
+    'REFUND_SPECIALIST': "Refund Specialist",
+    'GENERAL_SUPPORT': "Support Agent",
+    'ESCALATION_MANAGER': "Escalation Manager",
+    'MALE_SPECIALIST': "Men's Clothing Specialist",
+    'FEMALE_SPECIALIST': "Women's Clothing Specialist",
+    'BILLING': "Billing Specialist",
+    'DELIVERY': "Delivery Coordinator",
+    'ALTERATION': "Alteration Specialist"
+}
+
+# Status value -> (badge CSS class, display label)
+_STATUS_BADGES = {
+    status.value: (f"status-{status.value.replace('_', '-')}", status.value.replace('_', ' ').title())
+    for status in TicketStatus
+}
 
 def get_agent_display_name(agent_type):
     """Get user-friendly agent name"""
     if not agent_type or agent_type == 'SYSTEM':
         return 'AI Assistant'
     
-    agent_names = {
-        'INTENT_CLASSIFIER': "Intent Analyzer",
-        'ORCHESTRATOR': "Orchestrator",
-        'ORDER_SPECIALIST': "Order Specialist",
-        'TECHNICAL_SPECIALIST': "Technical Support",
-        'REFUND_SPECIALIST': "Refund Specialist",
-        'GENERAL_SUPPORT': "Support Agent",
-        'ESCALATION_MANAGER': "Escalation Manager",
-        'MALE_SPECIALIST': "Men's Clothing Specialist",
-        'FEMALE_SPECIALIST': "Women's Clothing Specialist",
-        'BILLING': "Billing Specialist",
-        'DELIVERY': "Delivery Coordinator",
-        'ALTERATION': "Alteration Specialist"
-    }
-    
-    return agent_names.get(str(agent_type), f"{str(agent_type).replace('_', ' ').title()}")
+    return _AGENT_NAMES.get(str(agent_type), f"{str(agent_type).replace('_', ' ').title()}")
+
+@functools.lru_cache(maxsize=1024)
+def parse_json_field(json_str: str):
+    """Parse a JSON field value; callers must treat the result as read-only"""
+    return json.loads(json_str)
 
 def format_json_field(json_str, title, emoji):
     """Parse and format JSON string into readable text"""
-    import json
     try:
-        data = json.loads(json_str) if isinstance(json_str, str) else json_str
+        data = parse_json_field(json_str) if isinstance(json_str, str) else json_str
         if isinstance(data, dict):
             lines = [f"{emoji} {title}:"]
             for key, value in data.items():
@@ -470,90 +363,86 @@ def format_json_field(json_str, title, emoji):
         # If parsing fails, return as-is
         return f"{emoji} {title}:\n{json_str}"
 
+# Field formatters: (value, label, emoji) -> text, or None to skip the field
+_FIELD_FORMATTERS = {
+    'block': lambda value, label, emoji: f"{emoji} {label}:\n{value}" if value else None,
+    'inline': lambda value, label, emoji: f"{emoji} {label}: {value}" if value else None,
+    'yes_no': lambda value, label, emoji: f"{emoji} {label}: {'✅ Yes' if value else '❌ No'}" if value is not None else None,
+    'yes_pending': lambda value, label, emoji: f"{emoji} {label}: {'✅ Yes' if value else '⏳ Pending'}" if value is not None else None,
+    'money': lambda value, label, emoji: f"{emoji} {label}: ${value:.2f}" if value is not None else None,
+    'json': lambda value, label, emoji: format_json_field(value, label, emoji) if value else None,
+    'list': lambda value, label, emoji: f"{emoji} {label}: {', '.join(value)}" if value else None,
+}
+
+# Agent type substring -> [(field, formatter, label, emoji)], matched in this order
+_AGENT_FIELDS = {
+    # Technical Specialist
+    'technical': [
+        ('troubleshooting_steps', 'block', "Troubleshooting Steps", "🔧"),
+        ('estimated_resolution_time', 'inline', "Estimated Resolution Time", "⏱️"),
+    ],
+    # Refund Specialist
+    'refund': [
+        ('eligibility_assessment', 'block', "Eligibility Assessment", "✅"),
+        ('required_documentation', 'block', "Required Documentation", "📄"),
+        ('processing_timeline', 'inline', "Processing Timeline", "⏰"),
+    ],
+    # Order Specialist
+    'order': [
+        ('suggested_actions', 'block', "Suggested Actions", "📋"),
+    ],
+    # General Support
+    'general': [
+        ('suggested_actions', 'block', "Suggested Actions", "💡"),
+    ],
+    # Male/Female Specialist ('male_specialist' also matches female_specialist)
+    'male_specialist': [
+        ('measurements_collected', 'yes_no', "Measurements Collected", "📏"),
+        ('measurements_data', 'json', "Measurements", "📐"),
+        ('validation_status', 'inline', "Validation Status", "✔️"),
+    ],
+    # Billing Agent
+    'billing': [
+        ('billing_complete', 'yes_pending', "Billing Complete", "💰"),
+        ('total_amount', 'money', "Total Amount", "💵"),
+        ('payment_status', 'inline', "Payment Status", "💳"),
+        ('invoice_details', 'json', "Invoice Details", "📄"),
+    ],
+    # Delivery Agent
+    'delivery': [
+        ('delivery_scheduled', 'yes_pending', "Delivery Scheduled", "🚚"),
+        ('delivery_date', 'inline', "Delivery Date", "📅"),
+        ('tracking_number', 'inline', "Tracking Number", "📦"),
+        ('delivery_address', 'block', "Delivery Address", "📍"),
+    ],
+    # Alteration Agent
+    'alteration': [
+        ('alteration_needed', 'yes_no', "Alteration Needed", "✂️"),
+        ('alteration_details', 'block', "Alteration Details", "✂️"),
+        ('additional_cost', 'money', "Additional Cost", "💵"),
+    ],
+    # Orchestrator
+    'orchestrator': [
+        ('synthesis_reasoning', 'block', "Reasoning", "🤖"),
+        ('agents_used', 'list', "Agents Consulted", "👥"),
+    ],
+}
+
 def format_additional_info_text(agent_type, additional_info):
     """Format additional information based on agent type as plain text"""
     if not additional_info:
         return ""
     
-    content = []
     agent_type_str = str(agent_type).lower()
+    fields = next((fields for key, fields in _AGENT_FIELDS.items() if key in agent_type_str), ())
     
-    # Technical Specialist - actual fields: troubleshooting_steps, estimated_resolution_time
-    if 'technical' in agent_type_str:
-        if additional_info.get('troubleshooting_steps'):
-            content.append(f"🔧 Troubleshooting Steps:\n{additional_info['troubleshooting_steps']}")
-        if additional_info.get('estimated_resolution_time'):
-            content.append(f"⏱️ Estimated Resolution Time: {additional_info['estimated_resolution_time']}")
-    
-    # Refund Specialist - actual fields: eligibility_assessment, required_documentation, processing_timeline
-    elif 'refund' in agent_type_str:
-        if additional_info.get('eligibility_assessment'):
-            content.append(f"✅ Eligibility Assessment:\n{additional_info['eligibility_assessment']}")
-        if additional_info.get('required_documentation'):
-            content.append(f"📄 Required Documentation:\n{additional_info['required_documentation']}")
-        if additional_info.get('processing_timeline'):
-            content.append(f"⏰ Processing Timeline: {additional_info['processing_timeline']}")
-    
-    # Order Specialist - actual fields: suggested_actions
-    elif 'order' in agent_type_str:
-        if additional_info.get('suggested_actions'):
-            content.append(f"📋 Suggested Actions:\n{additional_info['suggested_actions']}")
-    
-    # General Support - actual fields: suggested_actions
-    elif 'general' in agent_type_str:
-        if additional_info.get('suggested_actions'):
-            content.append(f"💡 Suggested Actions:\n{additional_info['suggested_actions']}")
-    
-    # Male/Female Specialist - actual fields: measurements_collected, measurements_data, validation_status
-    elif 'male_specialist' in agent_type_str or 'female_specialist' in agent_type_str:
-        if additional_info.get('measurements_collected') is not None:
-            content.append(f"📏 Measurements Collected: {'✅ Yes' if additional_info['measurements_collected'] else '❌ No'}")
-        if additional_info.get('measurements_data'):
-            # Parse JSON measurements data
-            content.append(format_json_field(additional_info['measurements_data'], "Measurements", "📐"))
-        if additional_info.get('validation_status'):
-            content.append(f"✔️ Validation Status: {additional_info['validation_status']}")
-    
-    # Billing Agent - actual fields: billing_complete, total_amount, payment_status, invoice_details
-    elif 'billing' in agent_type_str:
-        if additional_info.get('billing_complete') is not None:
-            content.append(f"💰 Billing Complete: {'✅ Yes' if additional_info['billing_complete'] else '⏳ Pending'}")
-        if additional_info.get('total_amount') is not None:
-            content.append(f"💵 Total Amount: ${additional_info['total_amount']:.2f}")
-        if additional_info.get('payment_status'):
-            content.append(f"💳 Payment Status: {additional_info['payment_status']}")
-        if additional_info.get('invoice_details'):
-            # Parse JSON invoice details
-            content.append(format_json_field(additional_info['invoice_details'], "Invoice Details", "📄"))
-    
-    # Delivery Agent - actual fields: delivery_scheduled, delivery_date, tracking_number, delivery_address
-    elif 'delivery' in agent_type_str:
-        if additional_info.get('delivery_scheduled') is not None:
-            content.append(f"🚚 Delivery Scheduled: {'✅ Yes' if additional_info['delivery_scheduled'] else '⏳ Pending'}")
-        if additional_info.get('delivery_date'):
-            content.append(f"📅 Delivery Date: {additional_info['delivery_date']}")
-        if additional_info.get('tracking_number'):
-            content.append(f"📦 Tracking Number: {additional_info['tracking_number']}")
-        if additional_info.get('delivery_address'):
-            content.append(f"📍 Delivery Address:\n{additional_info['delivery_address']}")
-    
-    # Alteration Agent - actual fields: alteration_needed, alteration_details, additional_cost
-    elif 'alteration' in agent_type_str:
-        if additional_info.get('alteration_needed') is not None:
-            content.append(f"✂️ Alteration Needed: {'✅ Yes' if additional_info['alteration_needed'] else '❌ No'}")
-        if additional_info.get('alteration_details'):
-            content.append(f"✂️ Alteration Details:\n{additional_info['alteration_details']}")
-        if additional_info.get('additional_cost') is not None:
-            content.append(f"💵 Additional Cost: ${additional_info['additional_cost']:.2f}")
-    
-    # Orchestrator
-    elif 'orchestrator' in agent_type_str:
-        if additional_info.get('synthesis_reasoning'):
-            content.append(f"🤖 Reasoning:\n{additional_info['synthesis_reasoning']}")
-        if additional_info.get('agents_used'):
-            content.append(f"👥 Agents Consulted: {', '.join(additional_info['agents_used'])}")
+    content = []
+    for field, formatter, label, emoji in fields:
+        text = _FIELD_FORMATTERS[formatter](additional_info.get(field), label, emoji)
+        if text:
+            content.append(text)
     
-    return "\n\n".join(content) if content else ""
+    return "\n\n".join(content)
 
 def display_ticket_header(ticket_state: Dict[str, Any]):
     """Display enhanced ticket header"""
@@ -571,8 +460,11 @@ def display_ticket_header(ticket_state: Dict[str, Any]):
     else:
         created_at = "Unknown"
     
-    status_class = f"status-{status.lower().replace('_', '-')}" if status else "status-unknown"
-    status_display = status.replace('_', ' ').title() if status else "Unknown"
+    if status in _STATUS_BADGES:
+        status_class, status_display = _STATUS_BADGES[status]
+    else:
+        status_class = f"status-{status.lower().replace('_', '-')}" if status else "status-unknown"
+        status_display = status.replace('_', ' ').title() if status else "Unknown"
     
     agent_display = ""
     if assigned_agent:
@@ -598,14 +490,20 @@ def display_ticket_actions(ticket_state: Dict[str, Any], ticket_id: str, custome
         with col1:
             if st.button("Resolve Ticket", use_container_width=True, key=f"resolve_{ticket_id}"):
                 with st.spinner("Resolving ticket..."):
-                    if run_async(mark_ticket_resolved(ticket_id, customer_id)):
+                    error = run_async(mark_ticket_resolved(ticket_id, customer_id))
+                    if error:
+                        st.error(error)
+                    else:
                         st.success("Ticket resolved!")
                         st.rerun()
 
         with col2:
             if st.button("Close Ticket", use_container_width=True, key=f"close_{ticket_id}"):
                 with st.spinner("Closing ticket..."):
-                    if run_async(close_ticket_by_customer(ticket_id, customer_id)):
+                    error = run_async(close_ticket_by_customer(ticket_id, customer_id))
+                    if error:
+                        st.error(error)
+                    else:
                         st.success("Ticket closed!")
                         st.rerun()
 
@@ -613,18 +511,10 @@ def display_ticket_actions(ticket_state: Dict[str, Any], ticket_id: str, custome
 @st.fragment(run_every=AUTO_REFRESH_INTERVAL)
 def display_ticket_view(ticket_id: str, customer_id: str):
     """Display ticket view with auto-refresh for active tickets using Streamlit fragments"""
-    # Track ticket changes
-    if 'last_seen_ticket_id' not in st.session_state:
-        st.session_state.last_seen_ticket_id = None
-    if 'last_message_count' not in st.session_state:
-        st.session_state.last_message_count = 0
-        
-    if st.session_state.last_seen_ticket_id != ticket_id:
-        st.session_state.last_message_count = 0
-        st.session_state.last_seen_ticket_id = ticket_id
-    
+    ui = ticket_ui(ticket_id)
+
     # Get current ticket state
-    ticket_state = run_async(get_ticket_state(ticket_id))
+    ticket_state = load_ticket_state(ticket_id)
     
     if not ticket_state:
         if 'current_ticket_status' in st.session_state:
@@ -641,38 +531,41 @@ def display_ticket_view(ticket_id: str, customer_id: str):
     
     # Display chat history
     chat_history = ticket_state.get('chat_history', [])
-    current_message_count = len(chat_history)
     pending_questions = ticket_state.get('pending_questions', {})
     
     st.markdown("### Conversation")
     display_chat_history(chat_history, pending_questions, ticket_id)
+
+    # Show the response as it is being synthesized, until the final message replaces it
+    response_draft = ticket_state.get('response_draft', '')
+    if response_draft and status not in ['CLOSED', 'RESOLVED']:
+        with st.chat_message("assistant"):
+            st.write(f"**{get_agent_display_name('ORCHESTRATOR')}**")
+            st.markdown(response_draft)
     
     # Message input (only if ticket is not closed/resolved)
     if status not in ['CLOSED', 'RESOLVED']:
         input_key = f"chat_input_{ticket_id}"
-        clear_flag_key = f"__clear_{input_key}"
 
-        if st.session_state.get(clear_flag_key):
+        if ui.pop("clear_input", False):
             st.session_state.pop(input_key, None)
-            st.session_state.pop(clear_flag_key, None)
 
         new_message = st.chat_input("Send a message to support…", key=input_key)
 
         if new_message and new_message.strip():
             with st.spinner("Sending message..."):
-                if run_async(send_message_to_ticket(ticket_id, new_message.strip(), customer_id)):
+                error = run_async(send_message_to_ticket(ticket_id, new_message.strip(), customer_id))
+                if error:
+                    st.error(error)
+                else:
                     st.success("Message sent!")
-                    st.session_state[clear_flag_key] = True
+                    ui["clear_input"] = True
                     st.rerun(scope="fragment")  # Rerun just this fragment immediately
         
         # Display ticket actions below the chat input
         display_ticket_actions(ticket_state, ticket_id, customer_id)
     else:
         st.info(f"This ticket is {status.lower()} and cannot receive new messages.")
-    
-    # Update message count tracking
-    if current_message_count != st.session_state.last_message_count:
-        st.session_state.last_message_count = current_message_count
 
 
 def main():
@@ -690,19 +583,18 @@ def main():
         st.session_state.current_ticket_id = None
     if 'customer_id' not in st.session_state:
         st.session_state.customer_id = None
-    if 'last_message_count' not in st.session_state:
-        st.session_state.last_message_count = 0
     if 'current_ticket_status' not in st.session_state:
         st.session_state.current_ticket_status = None
-    if 'last_seen_ticket_id' not in st.session_state:
-        st.session_state.last_seen_ticket_id = None
+
+    # Fetched once per rerun and shared by the sidebar and the overview
+    customer_tickets: List[Dict[str, Any]] = []
 
     # Sidebar - Customer Selection and Ticket Management
     with st.sidebar:
         st.header("Customer Profile")
         
         # Customer selection
-        customers = get_customers()
+        customers = cached_customers()
         customer_options = list(customers.keys())
         selected_customer = st.selectbox(
             "Select Customer ID:",
@@ -725,7 +617,8 @@ def main():
             # Ticket management
             st.header("Your Tickets")
 
-            customer_tickets = run_async(list_customer_tickets(st.session_state.customer_id))
+            active_ticket_id = st.session_state.get("pending_ticket_selection") or st.session_state.get("ticket_selector")
+            customer_tickets = load_customer_tickets(st.session_state.customer_id, active_ticket_id)
             ticket_lookup = {ticket["ticket_id"]: ticket for ticket in customer_tickets if ticket.get("ticket_id")}
 
             ticket_option_ids = ["__NEW__"] + list(ticket_lookup.keys())
@@ -778,7 +671,7 @@ def main():
         return
 
     # Provide a quick overview of the customer's tickets and recent activity
-    customer_ticket_overview = run_async(list_customer_tickets(st.session_state.customer_id))
+    customer_ticket_overview = customer_tickets
     if customer_ticket_overview:
         open_count = sum(1 for ticket in customer_ticket_overview if (ticket.get("status") or "").lower() == TicketStatus.OPEN.value)
         in_progress_count = sum(1 for ticket in customer_ticket_overview if (ticket.get("status") or "").lower() == TicketStatus.IN_PROGRESS.value)
@@ -801,7 +694,6 @@ def main():
     if st.session_state.current_ticket_id == "NEW":
         # New ticket creation
         st.session_state.current_ticket_status = None
-        st.session_state.last_message_count = 0
         st.header("Create New Support Ticket")
         
         with st.form("new_ticket_form"):
@@ -814,20 +706,21 @@ def main():
             submitted = st.form_submit_button("Create Ticket", type="primary")
             
             if submitted and initial_message.strip():
-                customers = get_customers()
+                customers = cached_customers()
                 customer_profile = customers[st.session_state.customer_id]
                 
                 with st.spinner("Creating your support ticket..."):
-                    ticket_id = run_async(create_new_ticket(
+                    ticket_id, error = run_async(create_new_ticket(
                         st.session_state.customer_id,
                         initial_message,
                         customer_profile
                     ))
                     
-                    if ticket_id:
+                    if error:
+                        st.error(error)
+                    elif ticket_id:
                         st.session_state.current_ticket_id = ticket_id
                         st.session_state.pending_ticket_selection = ticket_id
-                        st.session_state.last_message_count = 0
                         st.success(f"Ticket created successfully! ID: {ticket_id}")
                         st.rerun()
 
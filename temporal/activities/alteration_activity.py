@@ -1,19 +1,14 @@
 """Alteration Activity - Handle clothing alteration requests"""
 
-from typing import Any, Dict, List
-
 import dspy
-from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.utils import make_react_activity
+from activities.semantic_cache import SemanticCache
 from data.agent_models import AlterationInput, AlterationOutput
 from data.base_models import AgentType
 
-# Import MCP manager for dynamic tool loading
-from mcp_integration import mcp_manager
-
 # Import static tools (user interaction tools)
-from activities.tools.user_interaction_tools import ask_user_question, validate_user_response, set_workflow_context
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
 
 class AlterationResponse(dspy.Signature):
     """
@@ -44,10 +39,10 @@ class AlterationResponse(dspy.Signature):
     - Timeline: +5-7 business days
     - Total: $[product + alterations]"
     """
-    purchase_request: str = dspy.InputField()
-    conversation_context: str = dspy.InputField()
     customer_id: str = dspy.InputField()
     customer_profile: str = dspy.InputField()
+    conversation_context: str = dspy.InputField()
+    purchase_request: str = dspy.InputField()
     
     response: str = dspy.OutputField(desc="Alteration agent response")
     confidence: float = dspy.OutputField(desc="Response confidence 0-1")
@@ -56,55 +51,17 @@ class AlterationResponse(dspy.Signature):
     alteration_details: str = dspy.OutputField(desc="Details of alterations")
     additional_cost: float = dspy.OutputField(desc="Additional cost for alterations")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
-
-@activity.defn
-async def alteration_activity(input_data: AlterationInput) -> AlterationOutput:
-    """Alteration agent using DSPy.React with alteration tools"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Set workflow context for user interaction tools
-    set_workflow_context(
-        ticket_workflow_id=input_data.ticket_workflow_id,
-        ticket_id=input_data.ticket_id,
-        agent_type="ALTERATION"
-    )
-    
-    # Get tools from MCP servers for this agent type
-    static_tools = [ask_user_question, validate_user_response]
-    
-    all_tools = await mcp_manager.get_tools_for_agent(
-        AgentType.ALTERATION,
-        include_static_tools=static_tools
-    )
-    activity.logger.info(f"Alteration agent using {len(all_tools)} tools from MCP")
-    
-    # Create React module with dynamically loaded tools
-    alteration_react = dspy.ReAct(
-        AlterationResponse,
-        tools=all_tools
-    )
-    
-    # Convert customer_profile dict to string for ReAct compatibility
-    customer_profile_str = str(input_data.customer_profile) if input_data.customer_profile else "No profile data available"
-    
-    result = await alteration_react.acall(
-        purchase_request=input_data.purchase_request,
-        conversation_context=input_data.conversation_context,
-        customer_id=input_data.customer_id,
-        customer_profile=customer_profile_str
-    )
+# Reuse outputs for near-duplicate requests from the same customer
+_ALTERATION_CACHE = SemanticCache()
 
-    serialized_history = capture_llm_history()
-    
-    return AlterationOutput(
-        response=result.response,
-        confidence=float(result.confidence),
-        requires_escalation=result.requires_escalation,
-        alteration_needed=result.alteration_needed,
-        alteration_details=result.alteration_details,
-        additional_cost=float(result.additional_cost),
-        llm_history=serialized_history,
-        tool_results=getattr(result, 'tool_results', {})
-    )
+alteration_activity = make_react_activity(
+    "alteration_activity",
+    AlterationResponse,
+    AgentType.ALTERATION,
+    AlterationInput,
+    AlterationOutput,
+    static_tools=list(SHARED_USER_TOOLS),
+    request_field="purchase_request",
+    cache=_ALTERATION_CACHE,
+    stateful_field="alteration_needed"
+)
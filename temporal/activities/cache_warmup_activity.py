@@ -0,0 +1,50 @@
+"""Cache Warm-up Activity - Prime Gemini's implicit prompt cache for the purchase-flow agents"""
+
+import asyncio
+from typing import Any, Dict
+
+import dspy
+from temporalio import activity
+
+from activities.lm_registry import LM_FLASH
+from activities.utils import format_customer_profile, get_agent_tools, get_react_module, start_llm_history
+from activities.alteration_activity import AlterationResponse
+from activities.billing_activity import BillingResponse
+from activities.delivery_activity import DeliveryResponse, COMPARE_DELIVERY_OPTIONS_TOOL
+from activities.female_specialist_activity import FemaleSpecialistResponse, RECOMMEND_SIZES_TOOL
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
+from data.base_models import AgentType
+
+# Agents warmed up at ticket creation, with the static tools each one is built with
+_WARMUP_AGENTS = [
+    (AgentType.ALTERATION, AlterationResponse, list(SHARED_USER_TOOLS)),
+    (AgentType.BILLING, BillingResponse, list(SHARED_USER_TOOLS)),
+    (AgentType.DELIVERY, DeliveryResponse, [*SHARED_USER_TOOLS, COMPARE_DELIVERY_OPTIONS_TOOL]),
+    (AgentType.FEMALE_SPECIALIST, FemaleSpecialistResponse, [*SHARED_USER_TOOLS, RECOMMEND_SIZES_TOOL]),
+]
+
+async def _warm_up_agent(agent_type: AgentType, signature: type, static_tools: list, inputs: Dict[str, str]) -> None:
+    """Send the agent's first ReAct prompt up to and including the customer profile, for one output token"""
+    all_tools = await get_agent_tools(agent_type, static_tools)
+    react = get_react_module(signature, all_tools)
+
+    # Format with the same adapter and ReAct step signature the agent uses, so the prefix matches exactly
+    adapter = dspy.settings.adapter or dspy.JSONAdapter()
+    messages = adapter.format(react.react.signature, demos=[], inputs=inputs)
+    await LM_FLASH.acall(messages=messages, max_tokens=1)
+
+@activity.defn
+async def warmup_agent_caches_activity(customer_id: str, customer_profile: Dict[str, Any]) -> None:
+    """Prime the prompt cache for the purchase-flow agents"""
+    start_llm_history()
+    inputs = {
+        "customer_id": customer_id,
+        "customer_profile": format_customer_profile(customer_profile),
+    }
+    results = await asyncio.gather(
+        *(_warm_up_agent(agent_type, signature, tools, inputs) for agent_type, signature, tools in _WARMUP_AGENTS),
+        return_exceptions=True
+    )
+    for (agent_type, _, _), result in zip(_WARMUP_AGENTS, results):
+        if isinstance(result, Exception):
+            activity.logger.warning(f"Cache warm-up failed for {agent_type.value}: {result}")
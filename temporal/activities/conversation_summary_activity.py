@@ -0,0 +1,37 @@
+"""Conversation Summary Activity - Fold older chat turns into a bounded rolling summary"""
+
+from typing import List
+
+import dspy
+from temporalio import activity
+
+from activities.lm_registry import LM_FLASH_LITE
+from activities.utils import start_llm_history
+
+class SummarizeTurns(dspy.Signature):
+    """
+    Update a running summary of a customer support conversation with the new turns.
+
+    Keep every fact an agent may need later: order/purchase IDs, products, sizes, colors,
+    measurements, addresses, amounts, dates, decisions made and open questions.
+    Drop greetings, repetition and agent reasoning. Stay under 300 words.
+    """
+    previous_summary: str = dspy.InputField(desc="Summary of the conversation so far (may be empty)")
+    new_turns: List[str] = dspy.InputField(desc="Turns to fold into the summary, oldest first")
+
+    summary: str = dspy.OutputField(desc="Updated structured summary")
+
+_SUMMARIZER = dspy.Predict(SummarizeTurns)
+
+@activity.defn
+async def summarize_conversation_activity(previous_summary: str, new_turns: List[str]) -> str:
+    """Return previous_summary updated with new_turns"""
+    start_llm_history()
+    with dspy.context(lm=LM_FLASH_LITE):
+        result = await _SUMMARIZER.acall(
+            previous_summary=previous_summary,
+            new_turns=new_turns
+        )
+
+    activity.logger.info(f"Folded {len(new_turns)} turns into conversation summary")
+    return str(result.summary)
@@ -1,11 +1,17 @@
 """Escalation Agent Activity"""
 
+import asyncio
 from typing import Any, Dict, List
 
 import dspy
+import orjson
+import pydantic
 from temporalio import activity
 
-from activities.utils import capture_llm_history
+from cachetools import TTLCache
+
+from activities.lm_registry import LM_FLASH_LITE
+from activities.utils import capture_llm_history, exact_cache_key, format_customer_profile, signature_version, start_llm_history
 from data.agent_models import EscalationInput, EscalationOutput
 
 class EscalationDecision(dspy.Signature):
@@ -44,44 +50,152 @@ class EscalationDecision(dspy.Signature):
     Better to escalate early than frustrate customer further.
     High-value customers get priority escalation.
     """
-    conversation_history: List[str] = dspy.InputField()
+    conversation_history: str = dspy.InputField(desc="Conversation turns separated by ---")
     customer_satisfaction_indicators: List[str] = dspy.InputField()
     failed_resolution_attempts: int = dspy.InputField()
     urgency_level: int = dspy.InputField()
-    agent_responses: List[Dict[str, Any]] = dspy.InputField()
-    customer_profile: Dict[str, Any] = dspy.InputField()
+    agent_responses: str = dspy.InputField(desc="Agent responses as JSON")
+    customer_profile: str = dspy.InputField(desc="Customer profile as JSON")
     
     should_escalate: bool = dspy.OutputField(desc="Whether to escalate to human")
     escalation_reason: str = dspy.OutputField(desc="Reason for escalation")
     priority_level: int = dspy.OutputField(desc="Human agent priority 1-5")
     handover_summary: str = dspy.OutputField(desc="Context summary for human agent")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
+class EscalationDecisionFields(pydantic.BaseModel):
+    """Escalation decision for one ticket in a batch"""
+    should_escalate: bool = pydantic.Field(description="Whether to escalate to human")
+    escalation_reason: str = pydantic.Field(description="Reason for escalation")
+    priority_level: int = pydantic.Field(description="Human agent priority 1-5")
+    handover_summary: str = pydantic.Field(description="Context summary for human agent")
+
+class BatchedEscalationDecision(dspy.Signature):
+    """
+    Apply the escalation guidelines above to several independent tickets at once.
+    Return exactly one decision per ticket, in the same order as the input.
+    """
+    tickets: List[Dict[str, Any]] = dspy.InputField(
+        desc="One entry per ticket with conversation_history, customer_satisfaction_indicators, "
+             "failed_resolution_attempts, urgency_level, agent_responses and customer_profile"
+    )
+
+    decisions: List[EscalationDecisionFields] = dspy.OutputField(desc="One decision per ticket, same order")
+
+BatchedEscalationDecision = BatchedEscalationDecision.with_instructions(
+    f"{EscalationDecision.instructions}\n\n{BatchedEscalationDecision.instructions}"
+)
+
+# First-pass triage: same guidelines, but only the decision and how sure the model is
+EscalationTriage = (
+    EscalationDecision
+    .delete("escalation_reason")
+    .delete("priority_level")
+    .delete("handover_summary")
+    .append("confidence", dspy.OutputField(desc="Confidence in the decision 0-1"), type_=float)
+)
+
+# Escalations evaluated per Gemini call by escalation_batch_activity
+ESCALATION_BATCH_SIZE = 10
+
+# Flash-Lite "no escalation" verdicts at or above this confidence skip the full model
+ESCALATION_TRIAGE_CONFIDENCE = 0.8
+
+def _pack_escalation_inputs(input_data: EscalationInput) -> Dict[str, Any]:
+    """Render the escalation inputs into prompt-ready values once, instead of per field in the adapter"""
+    return {
+        "conversation_history": "\n---\n".join(input_data.conversation_history),
+        "customer_satisfaction_indicators": input_data.customer_satisfaction_indicators,
+        "failed_resolution_attempts": input_data.failed_resolution_attempts,
+        "urgency_level": input_data.urgency_level,
+        "agent_responses": orjson.dumps(input_data.agent_responses or [], option=orjson.OPT_SORT_KEYS, default=str).decode(),
+        "customer_profile": format_customer_profile(input_data.customer_profile),
+    }
+
+# Reuse the full model's "don't escalate" decisions for byte-identical escalation inputs only: a near-duplicate
+# conversation can differ in exactly the frustration or legal cue that should escalate it
+_ESCALATION_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+_ESCALATION_VERSION = signature_version(EscalationDecision)
+
+# Predictors are built once and shared by every activity call
+_TRIAGE_PREDICTOR = dspy.Predict(EscalationTriage)
+_ESCALATION_PREDICTOR = dspy.Predict(EscalationDecision)
+_BATCH_PREDICTOR = dspy.Predict(BatchedEscalationDecision)
 
 @activity.defn
 async def escalation_activity(input_data: EscalationInput) -> EscalationOutput:
     """Escalation agent to determine if human intervention is needed"""
-    dspy.context(lm=_GLOBAL_LM)
+    start_llm_history()
+    packed_inputs = _pack_escalation_inputs(input_data)
+
+    cache_key = exact_cache_key(_ESCALATION_VERSION, **packed_inputs)
+    cached_output = _ESCALATION_CACHE.get(cache_key)
+    if cached_output is not None:
+        return cached_output
     
-    escalation_predictor = dspy.Predict(EscalationDecision)
+    # Most evaluations end in "don't escalate"; let Flash-Lite settle the clear ones
+    with dspy.context(lm=LM_FLASH_LITE):
+        triage = await _TRIAGE_PREDICTOR.acall(**packed_inputs)
     
-    result = await escalation_predictor.acall(
-        conversation_history=input_data.conversation_history,
-        customer_satisfaction_indicators=input_data.customer_satisfaction_indicators,
-        failed_resolution_attempts=input_data.failed_resolution_attempts,
-        urgency_level=input_data.urgency_level,
-        agent_responses=input_data.agent_responses,
-        customer_profile=input_data.customer_profile
-    )
+    if not triage.should_escalate and float(triage.confidence) >= ESCALATION_TRIAGE_CONFIDENCE:
+        output = EscalationOutput(
+            should_escalate=False,
+            escalation_reason="Triage found no escalation triggers",
+            priority_level=5,
+            handover_summary="",
+            recommended_next_steps=["Continue with AI agents"],
+            llm_history=capture_llm_history()
+        )
+        # Not cached: only full-model decisions are reused
+        return output
+    
+    result = await _ESCALATION_PREDICTOR.acall(**packed_inputs)
 
     serialized_history = capture_llm_history()
     
-    return EscalationOutput(
+    output = EscalationOutput(
         should_escalate=result.should_escalate,
         escalation_reason=result.escalation_reason,
         priority_level=int(result.priority_level),
         handover_summary=result.handover_summary,
         recommended_next_steps=["Transfer to human agent", "Provide detailed context", "Monitor resolution"],
         llm_history=serialized_history
-    )
\ No newline at end of file
+    )
+    
+    if not output.should_escalate:
+        _ESCALATION_CACHE[cache_key] = output
+    
+    return output
+
+async def _decide_batch(inputs: List[EscalationInput]) -> List[EscalationOutput]:
+    """Evaluate up to ESCALATION_BATCH_SIZE tickets with a single Predict call"""
+    result = await _BATCH_PREDICTOR.acall(
+        tickets=[_pack_escalation_inputs(item) for item in inputs]
+    )
+
+    if len(result.decisions) != len(inputs):
+        activity.logger.warning(
+            f"Batched escalation returned {len(result.decisions)} decisions for {len(inputs)} tickets, "
+            "evaluating individually"
+        )
+        return [await escalation_activity(item) for item in inputs]
+
+    serialized_history = capture_llm_history()
+    return [
+        EscalationOutput(
+            should_escalate=decision.should_escalate,
+            escalation_reason=decision.escalation_reason,
+            priority_level=int(decision.priority_level),
+            handover_summary=decision.handover_summary,
+            recommended_next_steps=["Transfer to human agent", "Provide detailed context", "Monitor resolution"],
+            llm_history=serialized_history
+        )
+        for decision in result.decisions
+    ]
+
+@activity.defn
+async def escalation_batch_activity(inputs: List[EscalationInput]) -> List[EscalationOutput]:
+    """Escalation agent for several tickets at once, ESCALATION_BATCH_SIZE tickets per LM call"""
+    start_llm_history()
+    batches = [inputs[i:i + ESCALATION_BATCH_SIZE] for i in range(0, len(inputs), ESCALATION_BATCH_SIZE)]
+    results = await asyncio.gather(*(_decide_batch(batch) for batch in batches))
+    return [output for batch_outputs in results for output in batch_outputs]
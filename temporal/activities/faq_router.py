@@ -0,0 +1,70 @@
+"""Embedding match of customer messages against the FAQ's canonical questions.
+
+A message like "what's your return policy?" ends in a single search_faq_tool call
+and a restated answer; matching it against the FAQ questions directly answers it
+with one embedding call instead of a ReAct loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from activities.semantic_cache import embed_normalized
+from data.persistent_data import FAQ_FILE, get_faq
+
+logger = logging.getLogger(__name__)
+
+# Minimum cosine similarity between a message and an FAQ question to answer from the FAQ
+FAQ_MATCH_THRESHOLD = 0.85
+
+# (faq.json modification time, unit question embeddings, FAQ entries); rebuilt when the file changes
+_FAQ_INDEX: Optional[Tuple[Optional[int], np.ndarray, List[Dict[str, Any]]]] = None
+_FAQ_INDEX_LOCK = asyncio.Lock()
+
+
+def _faq_mtime() -> Optional[int]:
+    try:
+        return FAQ_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+async def _get_faq_index() -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    global _FAQ_INDEX
+    # One stat per message; the file is only read and embedded again after it changes
+    mtime = _faq_mtime()
+    if _FAQ_INDEX is not None and _FAQ_INDEX[0] == mtime:
+        return _FAQ_INDEX[1], _FAQ_INDEX[2]
+
+    async with _FAQ_INDEX_LOCK:
+        if _FAQ_INDEX is None or _FAQ_INDEX[0] != mtime:
+            faq_data = get_faq()
+            entries = [{**faq, "category": category} for category, faqs in faq_data.items() for faq in faqs]
+            embeddings = await embed_normalized([faq["question"] for faq in entries]) if entries else np.empty((0, 0))
+            _FAQ_INDEX = (mtime, embeddings, entries)
+        return _FAQ_INDEX[1], _FAQ_INDEX[2]
+
+
+async def match_faq(message: str, threshold: float = FAQ_MATCH_THRESHOLD) -> Optional[Tuple[Dict[str, Any], float]]:
+    """Return ``(faq_entry, similarity)`` for the FAQ question closest to ``message``.
+
+    None when no question scores above ``threshold`` or the embedding call fails,
+    in which case the caller runs its agent as usual.
+    """
+    try:
+        embeddings, entries = await _get_faq_index()
+        if not entries:
+            return None
+        scores = embeddings @ (await embed_normalized([message]))[0]
+    except Exception as e:
+        logger.warning(f"FAQ match failed, falling back to the agent: {e}")
+        return None
+
+    best = int(np.argmax(scores))
+    if scores[best] <= threshold:
+        return None
+    return entries[best], float(scores[best])
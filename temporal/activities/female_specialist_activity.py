@@ -1,19 +1,15 @@
 """Female Specialist Activity - Handle female clothing measurements and purchases"""
 
-from typing import Any, Dict, List
-
 import dspy
-from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.utils import make_react_activity
+from activities.semantic_cache import SemanticCache
 from data.agent_models import FemaleSpecialistInput, FemaleSpecialistOutput
 from data.base_models import AgentType
 
-# Import MCP manager for dynamic tool loading
-from mcp_integration import mcp_manager
-
 # Import static tools (user interaction tools)
-from activities.tools.user_interaction_tools import ask_user_question, validate_user_response, set_workflow_context
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
+from activities.tools.female_specialist_tools import recommend_sizes_female
 
 class FemaleSpecialistResponse(dspy.Signature):
     """
@@ -27,7 +23,8 @@ class FemaleSpecialistResponse(dspy.Signature):
        - Shoulder width (inches)
        - Sleeve length (inches)
     4. Validate measurements are realistic (use validate_female_measurements tool)
-    5. Recommend appropriate size based on measurements (use recommend_size_female tool)
+    5. Recommend appropriate size based on measurements (use recommend_size_female tool;
+       when comparing several products use recommend_sizes_female once for all of them)
     6. Ask for color preference from available colors
     7. Save measurements using record_female_measurements tool
     8. Confirm final selection: product name, size, color
@@ -42,10 +39,10 @@ class FemaleSpecialistResponse(dspy.Signature):
     - Measurements saved
     The billing agent will now process your payment."
     """
-    purchase_request: str = dspy.InputField()
-    conversation_context: str = dspy.InputField()
     customer_id: str = dspy.InputField()
     customer_profile: str = dspy.InputField()
+    conversation_context: str = dspy.InputField()
+    purchase_request: str = dspy.InputField()
     
     response: str = dspy.OutputField(desc="Female specialist response")
     confidence: float = dspy.OutputField(desc="Response confidence 0-1")
@@ -54,55 +51,19 @@ class FemaleSpecialistResponse(dspy.Signature):
     measurements_data: str = dspy.OutputField(desc="JSON string of measurements")
     validation_status: str = dspy.OutputField(desc="Measurement validation status")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
+RECOMMEND_SIZES_TOOL = dspy.Tool(recommend_sizes_female)
 
-@activity.defn
-async def female_specialist_activity(input_data: FemaleSpecialistInput) -> FemaleSpecialistOutput:
-    """Female specialist agent using DSPy.React with measurement tools"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Set workflow context for user interaction tools
-    set_workflow_context(
-        ticket_workflow_id=input_data.ticket_workflow_id,
-        ticket_id=input_data.ticket_id,
-        agent_type="FEMALE_SPECIALIST"
-    )
-    
-    # Get tools from MCP servers for this agent type
-    static_tools = [ask_user_question, validate_user_response]
-    
-    all_tools = await mcp_manager.get_tools_for_agent(
-        AgentType.FEMALE_SPECIALIST,
-        include_static_tools=static_tools
-    )
-    activity.logger.info(f"Female specialist using {len(all_tools)} tools from MCP")
-    
-    # Create React module with dynamically loaded tools
-    female_react = dspy.ReAct(
-        FemaleSpecialistResponse,
-        tools=all_tools
-    )
-    
-    # Convert customer_profile dict to string for ReAct compatibility
-    customer_profile_str = str(input_data.customer_profile) if input_data.customer_profile else "No profile data available"
-    
-    result = await female_react.acall(
-        purchase_request=input_data.purchase_request,
-        conversation_context=input_data.conversation_context,
-        customer_id=input_data.customer_id,
-        customer_profile=customer_profile_str
-    )
+# Reuse outputs for near-duplicate requests from the same customer
+_FEMALE_SPECIALIST_CACHE = SemanticCache()
 
-    serialized_history = capture_llm_history()
-    
-    return FemaleSpecialistOutput(
-        response=result.response,
-        confidence=float(result.confidence),
-        requires_escalation=result.requires_escalation,
-        measurements_collected=result.measurements_collected,
-        measurements_data=result.measurements_data,
-        validation_status=result.validation_status,
-        llm_history=serialized_history,
-        tool_results=getattr(result, 'tool_results', {})
-    )
+female_specialist_activity = make_react_activity(
+    "female_specialist_activity",
+    FemaleSpecialistResponse,
+    AgentType.FEMALE_SPECIALIST,
+    FemaleSpecialistInput,
+    FemaleSpecialistOutput,
+    static_tools=[*SHARED_USER_TOOLS, RECOMMEND_SIZES_TOOL],
+    request_field="purchase_request",
+    cache=_FEMALE_SPECIALIST_CACHE,
+    stateful_field="measurements_collected"
+)
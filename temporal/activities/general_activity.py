@@ -1,19 +1,18 @@
 """General Support Activity"""
 
-from typing import Any, Dict, List
+from typing import Optional
 
 import dspy
 from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.faq_router import match_faq
+from activities.utils import make_react_activity
+from activities.semantic_cache import SemanticCache
 from data.agent_models import GeneralSupportInput, GeneralSupportOutput
 from data.base_models import AgentType
 
-# Import MCP manager for dynamic tool loading
-from mcp_integration import mcp_manager
-
 # Import static tools (user interaction tools)
-from activities.tools.user_interaction_tools import ask_user_question, validate_user_response, set_workflow_context
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
 
 class GeneralSupportResponse(dspy.Signature):
     """
@@ -34,63 +33,54 @@ class GeneralSupportResponse(dspy.Signature):
     
     End with helpful summary and next steps if applicable.
     """
-    customer_message: str = dspy.InputField()
-    conversation_context: str = dspy.InputField()
     customer_id: str = dspy.InputField()
     customer_profile: str = dspy.InputField()
+    conversation_context: str = dspy.InputField()
+    customer_message: str = dspy.InputField()
     
     response: str = dspy.OutputField(desc="General support response")
     confidence: float = dspy.OutputField(desc="Response confidence")
     requires_escalation: bool = dspy.OutputField(desc="Needs human intervention")
     suggested_actions: str = dspy.OutputField(desc="Follow-up actions")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
+# Reuse outputs for paraphrased questions from the same customer in the same conversation
+_GENERAL_SUPPORT_CACHE = SemanticCache()
 
-@activity.defn
-async def general_support_activity(input_data: GeneralSupportInput) -> GeneralSupportOutput:
-    """General support agent using DSPy.React with general tools"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Set workflow context for user interaction tools
-    set_workflow_context(
-        ticket_workflow_id=input_data.ticket_workflow_id,
-        ticket_id=input_data.ticket_id,
-        agent_type="GENERAL_SUPPORT"
-    )
-    
-    # Get tools from MCP servers for this agent type
-    static_tools = [ask_user_question, validate_user_response]
-    
-    all_tools = await mcp_manager.get_tools_for_agent(
-        AgentType.GENERAL_SUPPORT,
-        include_static_tools=static_tools
-    )
-    activity.logger.info(f"General support using {len(all_tools)} tools from MCP")
-    
-    # Create React module with dynamically loaded tools
-    general_react = dspy.ReAct(
-        GeneralSupportResponse,
-        tools=all_tools
-    )
-    
-    # Convert customer_profile dict to string for ReAct compatibility
-    customer_profile_str = str(input_data.customer_profile) if input_data.customer_profile else "No profile data available"
-    
-    result = await general_react.acall(
-        customer_message=input_data.customer_message,
-        conversation_context=input_data.conversation_context,
-        customer_id=input_data.customer_id,
-        customer_profile=customer_profile_str
-    )
+# Sections the orchestrator adds to conversation_context when there is earlier conversation
+# or output from previous agents; a canned FAQ answer would ignore either
+_PRIOR_CONTEXT_MARKERS = ("Previous conversation:", "--- Information from previous agents ---")
 
-    serialized_history = capture_llm_history()
-    
+async def _answer_from_faq(input_data: GeneralSupportInput) -> Optional[GeneralSupportOutput]:
+    """Answer opening messages that are plainly one of the FAQ's questions without running ReAct"""
+    if any(marker in input_data.conversation_context for marker in _PRIOR_CONTEXT_MARKERS):
+        return None
+
+    match = await match_faq(input_data.customer_message)
+    if match is None:
+        return None
+
+    faq, similarity = match
+    activity.logger.info(f"General support answered from FAQ '{faq['question']}' (similarity {similarity:.3f})")
     return GeneralSupportOutput(
-        response=result.response,
-        confidence=float(result.confidence),
-        requires_escalation=result.requires_escalation,
-        suggested_actions=result.suggested_actions,  # Now expects str, not list
-        llm_history=serialized_history,
-        tool_results=getattr(result, 'tool_results', {})
-    )
\ No newline at end of file
+        response=faq["answer"],
+        confidence=0.95,
+        requires_escalation=False,
+        suggested_actions="",
+        llm_history="",
+        tool_results={"search_faq_tool": {"success": True, "faq_results": [faq], "count": 1}}
+    )
+
+general_support_activity = make_react_activity(
+    "general_support_activity",
+    GeneralSupportResponse,
+    AgentType.GENERAL_SUPPORT,
+    GeneralSupportInput,
+    GeneralSupportOutput,
+    static_tools=list(SHARED_USER_TOOLS),
+    request_field="customer_message",
+    cache=_GENERAL_SUPPORT_CACHE,
+    cache_per_context=True,
+    exact_cache=True,
+    fast_path=_answer_from_faq,
+    max_iters=4
+)
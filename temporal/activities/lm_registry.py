@@ -0,0 +1,75 @@
+"""Shared Gemini LMs for every activity.
+
+Every activity imports its LM from here instead of building its own, so all
+agents go through the same per-model concurrency cap and one pooled HTTP/2
+client: back-to-back calls reuse open TCP/TLS connections, and concurrent calls
+from different activities are multiplexed as streams over the same connection.
+"""
+
+import asyncio
+import os
+
+import dspy
+import httpx
+from dotenv import load_dotenv
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler, get_ssl_configuration
+
+from activities.utils import record_llm_history
+
+load_dotenv()
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "200"))
+
+
+class ThrottledLM(dspy.LM):
+    """dspy.LM whose async path is capped by a per-worker semaphore.
+
+    LM.aforward already awaits litellm.acompletion on the event loop, so ReAct.acall
+    never touches a thread pool for completions; the semaphore only keeps in-flight
+    Gemini requests inside the project's QPS quota.
+    """
+
+    def __init__(self, *args, max_concurrency: int = GEMINI_MAX_CONCURRENCY, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def aforward(self, *args, **kwargs):
+        async with self._semaphore:
+            return await super().aforward(*args, **kwargs)
+
+    def update_history(self, entry):
+        super().update_history(entry)
+        record_llm_history(entry)
+
+
+class HTTP2Handler(AsyncHTTPHandler):
+    """litellm HTTP handler on an HTTP/2 httpx transport.
+
+    litellm's default aiohttp transport speaks HTTP/1.1 only, one request per
+    connection at a time; over HTTP/2 a burst of concurrent requests shares a
+    single TLS connection instead of opening one each.
+    """
+
+    def create_client(self, timeout, concurrent_limit, event_hooks, ssl_verify=None) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            verify=get_ssl_configuration(ssl_verify),
+            limits=httpx.Limits(max_connections=concurrent_limit, max_keepalive_connections=concurrent_limit),
+        )
+        return httpx.AsyncClient(transport=transport, timeout=timeout, event_hooks=event_hooks, follow_redirects=True)
+
+
+# One connection pool for all Gemini calls; connections and keep-alives are sized
+# to the concurrency cap so a request past the semaphore never waits on a socket
+_GEMINI_HTTP_CLIENT = HTTP2Handler(
+    timeout=httpx.Timeout(timeout=600.0, connect=5.0),
+    concurrent_limit=GEMINI_MAX_CONCURRENCY,
+    client_alias="gemini",
+)
+
+# The request cache stays off: it hashes every request kwarg (the client included),
+# and identical specialist prompts are already answered by the activity-level caches
+LM_FLASH = ThrottledLM("gemini/gemini-2.5-flash", num_retries=3, cache=False, client=_GEMINI_HTTP_CLIENT)
+
+# Summarization and escalation triage don't need the full model
+LM_FLASH_LITE = ThrottledLM("gemini/gemini-2.5-flash-lite", num_retries=3, cache=False, client=_GEMINI_HTTP_CLIENT)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import uuid
 from datetime import datetime, timedelta, timezone
@@ -7,33 +8,17 @@ from typing import Any, Dict, List
 
 from dotenv import load_dotenv
 from temporalio import activity
-from temporalio.client import Client
 
 from data.base_models import MessageType, TicketStatus
-from data.ticket_models import ChatMessage, TicketState
+from data.search_attributes import LAST_ACTIVITY_AT, TICKET_STATUS
+from data.ticket_models import ChatMessage
 
 load_dotenv()
 
-TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
-TEMPORAL_NAMESPACE = os.getenv("TEMPORAL_NAMESPACE", "default")
 AUTO_CLOSE_DEFAULT_MINUTES = int(os.getenv("AUTO_CLOSE_INACTIVITY_MINUTES", "60"))
 DEFAULT_CLOSURE_MESSAGE = "This ticket is now closed due to inactivity"
-
-
-def _coerce_utc(dt: datetime | str | None) -> datetime | None:
-    if dt is None:
-        return None
-
-    if isinstance(dt, str):
-        try:
-            dt = datetime.fromisoformat(dt.replace("Z", "+00:00"))
-        except ValueError:
-            return None
-
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-
-    return dt.astimezone(timezone.utc)
+# Tickets signalled at once by the auto-close sweep
+AUTO_CLOSE_CONCURRENCY = 32
 
 
 @activity.defn
@@ -52,65 +37,101 @@ async def auto_close_inactive_tickets_activity(config: Dict[str, Any] | None = N
     closure_message = config.get("closure_message", DEFAULT_CLOSURE_MESSAGE)
 
     cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=inactivity_minutes)
-    closed_tickets: List[str] = []
-    evaluated_tickets: List[str] = []
 
-    client = await Client.connect(TEMPORAL_ADDRESS, namespace=TEMPORAL_NAMESPACE)
+    # The worker's own client: no new gRPC channel per scheduled run
+    client = activity.client()
+
+    # The SDK throttles heartbeats to the heartbeat timeout, so every unit of progress can report one
+    async def list_tickets(query: str) -> List[Any]:
+        workflows = []
+        async for wf in client.list_workflows(query):
+            workflows.append(wf)
+            activity.heartbeat()
+        activity.heartbeat()
+        return workflows
     
-    query = "WorkflowType='TicketWorkflow' AND ExecutionStatus='Running'"
-    async for wf in client.list_workflows(query):
-        evaluated_tickets.append(wf.id)
-        handle = client.get_workflow_handle(wf.id, run_id=wf.run_id)
-
-        state = await handle.query("getState")
-
-        if not state:
-            continue
-
-        if isinstance(state, TicketState):
-            ticket_state = state
-        elif isinstance(state, dict):
-            ticket_state = TicketState.from_dict(state)
-        else:
-            raise TypeError(f"Unexpected state type: {type(state)!r}")
-
-        if ticket_state.status != TicketStatus.OPEN:
-            continue
-
-        activity_candidates: List[datetime] = []
-        activity_candidates.append(_coerce_utc(ticket_state.last_updated))
-        for message in ticket_state.chat_history:
-            activity_candidates.append(_coerce_utc(message.timestamp))
-
-        # Filter out any None values that may arise from malformed history
-        meaningful_candidates = [dt for dt in activity_candidates if dt is not None]
-
-        last_activity_at = max(meaningful_candidates)
-        print(last_activity_at, cutoff_time, wf.id)
-        if last_activity_at >= cutoff_time:
-            continue
-
-        timestamp_now = datetime.now(timezone.utc)
-        message = ChatMessage(
-            id=f"auto-close-{uuid.uuid4()}",
-            ticket_id=ticket_state.ticket_id or wf.id,
-            content=closure_message,
-            message_type=MessageType.SYSTEM,
-            agent_type=None,
-            timestamp=timestamp_now,
-            metadata={
-                "source": "ticket_auto_close_schedule",
-                "closed_at": timestamp_now.isoformat(),
-            },
-        )
+    # Status and inactivity are both search attributes kept current by TicketWorkflow,
+    # so visibility returns exactly the tickets to close without querying each one
+    query = (
+        "WorkflowType='TicketWorkflow' AND ExecutionStatus='Running'"
+        f" AND {TICKET_STATUS.name}='{TicketStatus.OPEN.value}'"
+        f" AND {LAST_ACTIVITY_AT.name} < '{cutoff_time.isoformat()}'"
+    )
+    inactive_workflows = await list_tickets(query)
+
+    errors: List[str] = []
+    semaphore = asyncio.Semaphore(AUTO_CLOSE_CONCURRENCY)
+
+    # Tickets started before LastActivityAt was introduced may never have set it (nor TicketStatus);
+    # check those the old way, through the workflow's own state
+    unindexed_query = (
+        "WorkflowType='TicketWorkflow' AND ExecutionStatus='Running'"
+        f" AND {LAST_ACTIVITY_AT.name} IS NULL"
+        f" AND StartTime < '{cutoff_time.isoformat()}'"
+    )
+    unindexed_workflows = await list_tickets(unindexed_query)
+
+    async def is_inactive(wf) -> bool:
+        async with semaphore:
+            try:
+                summary = await client.get_workflow_handle(wf.id, run_id=wf.run_id).query("getSummary")
+            except Exception as e:
+                errors.append(f"{wf.id}: {e}")
+                return False
+            finally:
+                activity.heartbeat()
+        if not summary or summary.get("status") != TicketStatus.OPEN.value:
+            return False
+        last_updated = datetime.fromisoformat(summary["last_updated"])
+        if last_updated.tzinfo is None:
+            last_updated = last_updated.replace(tzinfo=timezone.utc)
+        return last_updated < cutoff_time
+
+    evaluated = len(inactive_workflows) + len(unindexed_workflows)
+    inactive_flags = await asyncio.gather(*(is_inactive(wf) for wf in unindexed_workflows))
+    inactive_workflows += [wf for wf, inactive in zip(unindexed_workflows, inactive_flags) if inactive]
 
-        await handle.signal("addMessage", message.to_dict())
-        await handle.signal("updateTicketStatus", TicketStatus.CLOSED.value)
-        closed_tickets.append(message.ticket_id)
+    closed_tickets: List[str] = []
+
+    async def close_ticket(wf) -> None:
+        activity.logger.debug(
+            "ticket %s last_activity=%s cutoff=%s",
+            wf.id, wf.typed_search_attributes.get(LAST_ACTIVITY_AT), cutoff_time
+        )
+        async with semaphore:
+            handle = client.get_workflow_handle(wf.id, run_id=wf.run_id)
+            timestamp_now = datetime.now(timezone.utc)
+            message = ChatMessage(
+                id=f"auto-close-{uuid.uuid4()}",
+                ticket_id=wf.id,
+                content=closure_message,
+                message_type=MessageType.SYSTEM,
+                agent_type=None,
+                timestamp=timestamp_now,
+                metadata={
+                    "source": "ticket_auto_close_schedule",
+                    "closed_at": timestamp_now.isoformat(),
+                },
+            )
+
+            # Sequential on purpose: closing first would let the workflow complete before the message lands
+            try:
+                await handle.signal("addMessage", message.to_dict())
+                await handle.signal("updateTicketStatus", TicketStatus.CLOSED.value)
+            except Exception as e:
+                errors.append(f"{wf.id}: {e}")
+                return
+            finally:
+                activity.heartbeat()
+
+            closed_tickets.append(wf.id)
+
+    await asyncio.gather(*(close_ticket(wf) for wf in inactive_workflows))
 
     return {
-        "evaluated": len(evaluated_tickets),
+        "evaluated": evaluated,
         "closed": len(closed_tickets),
         "closed_ticket_ids": closed_tickets,
+        "errors": errors,
         "inactivity_minutes": inactivity_minutes,
     }
@@ -1,19 +1,13 @@
 """Male Specialist Activity - Handle male clothing measurements and purchases"""
 
-from typing import Any, Dict, List
-
 import dspy
-from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.utils import make_react_activity
 from data.agent_models import MaleSpecialistInput, MaleSpecialistOutput
 from data.base_models import AgentType
 
-# Import MCP manager for dynamic tool loading
-from mcp_integration import mcp_manager
-
 # Import static tools (user interaction tools)
-from activities.tools.user_interaction_tools import ask_user_question, validate_user_response, set_workflow_context
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
 
 class MaleSpecialistResponse(dspy.Signature):
     """
@@ -43,10 +37,10 @@ class MaleSpecialistResponse(dspy.Signature):
     - Measurements saved
     The billing agent will now process your payment."
     """
-    purchase_request: str = dspy.InputField()
-    conversation_context: str = dspy.InputField()
     customer_id: str = dspy.InputField()
     customer_profile: str = dspy.InputField()
+    conversation_context: str = dspy.InputField()
+    purchase_request: str = dspy.InputField()
     
     response: str = dspy.OutputField(desc="Male specialist response")
     confidence: float = dspy.OutputField(desc="Response confidence 0-1")
@@ -55,55 +49,16 @@ class MaleSpecialistResponse(dspy.Signature):
     measurements_data: str = dspy.OutputField(desc="JSON string of measurements")
     validation_status: str = dspy.OutputField(desc="Measurement validation status")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
-
-@activity.defn
-async def male_specialist_activity(input_data: MaleSpecialistInput) -> MaleSpecialistOutput:
-    """Male specialist agent using DSPy.React with measurement tools"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Set workflow context for user interaction tools
-    set_workflow_context(
-        ticket_workflow_id=input_data.ticket_workflow_id,
-        ticket_id=input_data.ticket_id,
-        agent_type="MALE_SPECIALIST"
-    )
-    
-    # Get tools from MCP servers for this agent type
-    static_tools = [ask_user_question, validate_user_response]
-    
-    all_tools = await mcp_manager.get_tools_for_agent(
-        AgentType.MALE_SPECIALIST,
-        include_static_tools=static_tools
-    )
-    activity.logger.info(f"Male specialist using {len(all_tools)} tools from MCP")
-    
-    # Create React module with dynamically loaded tools
-    male_react = dspy.ReAct(
-        MaleSpecialistResponse,
-        tools=all_tools
-    )
-    
-    # Convert customer_profile dict to string for ReAct compatibility
-    customer_profile_str = str(input_data.customer_profile) if input_data.customer_profile else "No profile data available"
-    
-    result = await male_react.acall(
-        purchase_request=input_data.purchase_request,
-        conversation_context=input_data.conversation_context,
-        customer_id=input_data.customer_id,
-        customer_profile=customer_profile_str
-    )
-
-    serialized_history = capture_llm_history()
-    
-    return MaleSpecialistOutput(
-        response=result.response,
-        confidence=float(result.confidence),
-        requires_escalation=result.requires_escalation,
-        measurements_collected=result.measurements_collected,
-        measurements_data=result.measurements_data,
-        validation_status=result.validation_status,
-        llm_history=serialized_history,
-        tool_results=getattr(result, 'tool_results', {})
-    )
+male_specialist_activity = make_react_activity(
+    "male_specialist_activity",
+    MaleSpecialistResponse,
+    AgentType.MALE_SPECIALIST,
+    MaleSpecialistInput,
+    MaleSpecialistOutput,
+    static_tools=list(SHARED_USER_TOOLS),
+    request_field="purchase_request",
+    stateful_field="measurements_collected",
+    exact_cache=True,
+    plan_first=True,
+    max_iters=8
+)
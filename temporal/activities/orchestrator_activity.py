@@ -1,12 +1,18 @@
 """Orchestrator Planning and Synthesis Activities - Intelligent Multi-Agent Coordination"""
 
 from typing import Any, Dict, List, Literal
+import dataclasses
+import hashlib
 import json
+import os
+import re
+import time
 import dspy
 import pydantic
 from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.semantic_cache import SemanticCache
+from activities.utils import capture_llm_history, format_customer_profile, start_llm_history
 from data.agent_models import (
     OrchestratorInput, OrchestratorOutput, 
     ExecutionPlan, ExecutionStep, AgentExecutionResult
@@ -68,10 +74,11 @@ class OrchestratorPlanning(dspy.Signature):
     CRITICAL RULE: If a step depends_on another step, it MUST have that step's reference in context_refs.
     Example: If step 2 depends_on=[1], then step 2 must have context_refs=['step_1']
     """
-    customer_message: str = dspy.InputField(desc="The customer's query/request")
-    conversation_history: str = dspy.InputField(desc="Previous conversation context")
-    customer_profile: dict = dspy.InputField(desc="Customer tier, history, preferences")
+    # Stable fields first so Gemini's implicit prefix cache covers as much of the prompt as possible
     available_agents: list[str] = dspy.InputField(desc="List of available specialist agent types")
+    customer_profile: str = dspy.InputField(desc="Customer tier, history, preferences (JSON)")
+    conversation_history: str = dspy.InputField(desc="Previous conversation context")
+    customer_message: str = dspy.InputField(desc="The customer's query/request")
     
     steps: list[ExecutionStepOutput] = dspy.OutputField(
         desc="Execution plan steps. MUST populate context_refs=['step_X'] for any step that has depends_on=[X]"
@@ -155,17 +162,99 @@ class OrchestratorSynthesis(dspy.Signature):
     )
 
 
-# ============================================================================
-# GLOBAL LM CONFIGURATION
-# ============================================================================
+# Modules are built once; acall takes every input as an argument, so concurrent activities share them.
+# ChainOfThought for complex reasoning with detailed agent instructions in the signature docstring,
+# and for thoughtful synthesis
+_PLANNER = dspy.ChainOfThought(OrchestratorPlanning)
+_SYNTHESIZER = dspy.ChainOfThought(OrchestratorSynthesis)
+
+# AgentType values a planned step may name
+_VALID_AGENT_TYPES = frozenset(agent_type.value for agent_type in AgentType)
+
+# Single-intent post-purchase messages the planner always routes to one agent; a message
+# matching exactly one pattern (and none of _FAST_PLAN_EXCLUSIONS) skips the LLM planner
+_FAST_PLAN_PATTERNS = [
+    ("order_specialist", re.compile(
+        r"\b(track(ing)?|where\s+is\s+my|shipping\s+status|order\s*(#|no\.?|number)?\s*[A-Z]*-?\d+)", re.I
+    )),
+    ("refund_specialist", re.compile(r"\b(refund|money\s+back)\b", re.I)),
+    ("technical_specialist", re.compile(
+        r"\b(broken|not\s+working|(doesn'?t|won'?t)\s+(work|turn\s+on|start|charge)|crash(es|ed|ing)?|defective)\b", re.I
+    )),
+]
+# Purchases (multi-step flows) and policy/FAQ questions are left to the planner
+_FAST_PLAN_EXCLUSIONS = re.compile(
+    r"\b(buy|purchase|shop\s+for|looking\s+for|want\s+to\s+get|need\s+new|policy|policies|how\s+(do|long|much))\b", re.I
+)
+
+# Returned when planning fails; only ever serialized back to the workflow, never mutated
+_FALLBACK_PLAN = ExecutionPlan(
+    steps=[
+        ExecutionStep(
+            step_number=1,
+            agent_type="general_support",
+            reason="Fallback plan due to orchestrator error",
+            depends_on=[],
+            context_references=[],
+            priority=1
+        )
+    ],
+    strategy="sequential",
+    complexity_level="simple",
+    estimated_duration_seconds=10,
+    reasoning="Fallback to simple plan due to error"
+)
+
+# Plans for opening messages of new tickets, shared across customers: "track my order"
+# and "where is order #123" get the same plan. Partitioned by the intents the fast-path
+# patterns detect, so a refund request never reuses a tracking plan however close the
+# wording, and matched only on near-identical phrasing
+_PLAN_CACHE = SemanticCache(maxsize=1024, threshold=0.97)
+_PLAN_CACHE_LOOKUPS = 0
+_PLAN_CACHE_HITS = 0
 
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
+# Synthesized responses for identical agent results, so activity retries and duplicate
+# submissions skip the LM; opt-in because a hit replays an earlier wording verbatim
+ORCHESTRATOR_SYNTHESIS_CACHE = os.getenv("ORCHESTRATOR_SYNTHESIS_CACHE", "false").lower() in ("1", "true", "yes")
+_SYNTHESIS_CACHE = SemanticCache(maxsize=1024, threshold=0.95)
+
+# Minimum seconds between response draft signals to the ticket workflow while streaming
+RESPONSE_DRAFT_SIGNAL_INTERVAL = 2.0
 
 
 # ============================================================================
 # ORCHESTRATOR PLANNING ACTIVITY
 # ============================================================================
 
+def _detected_intents(message: str) -> List[str]:
+    """Agents whose fast-path pattern matches ``message``."""
+    return [agent for agent, pattern in _FAST_PLAN_PATTERNS if pattern.search(message)]
+
+def _fast_plan(message: str, available_agents: List[str]) -> ExecutionPlan | None:
+    """One-step plan for an unambiguous single-intent message, or None to use the planner."""
+    if _FAST_PLAN_EXCLUSIONS.search(message):
+        return None
+    matches = _detected_intents(message)
+    if len(matches) != 1 or matches[0] not in available_agents:
+        return None
+    
+    return ExecutionPlan(
+        steps=[
+            ExecutionStep(
+                step_number=1,
+                agent_type=matches[0],
+                reason="Single-intent request matched by the fast-path classifier",
+                depends_on=[],
+                context_references=[],
+                priority=1
+            )
+        ],
+        strategy="sequential",
+        complexity_level="simple",
+        estimated_duration_seconds=8,
+        reasoning="fast-path"
+    )
+
 @activity.defn
 async def orchestrator_planning_activity(input_data: OrchestratorInput) -> ExecutionPlan:
     """
@@ -178,10 +267,33 @@ async def orchestrator_planning_activity(input_data: OrchestratorInput) -> Execu
     4. Creates execution plan with stages
     5. Chooses execution strategy (sequential, parallel, hybrid)
     """
-    dspy.context(lm=_GLOBAL_LM)
+    start_llm_history()
+    fast_plan = _fast_plan(input_data.customer_message, input_data.available_agents)
+    if fast_plan is not None:
+        activity.logger.info(f"Orchestrator fast-path plan: {fast_plan.steps[0].agent_type}")
+        return fast_plan
     
-    # Use ChainOfThought for complex reasoning with detailed agent instructions in signature docstring
-    planner = dspy.ChainOfThought(OrchestratorPlanning)
+    # Only a ticket's opening message is planned from the message alone; later
+    # messages ("yes", "ORD-123") depend on the conversation and always go to the planner
+    global _PLAN_CACHE_LOOKUPS, _PLAN_CACHE_HITS
+    plan_cache_key = None
+    if not input_data.chat_history and not input_data.conversation_summary:
+        cached_plan, plan_cache_key = await _PLAN_CACHE.lookup(
+            (
+                tuple(sorted(input_data.available_agents)),
+                tuple(_detected_intents(input_data.customer_message)),
+                bool(_FAST_PLAN_EXCLUSIONS.search(input_data.customer_message)),
+            ),
+            input_data.customer_message
+        )
+        _PLAN_CACHE_LOOKUPS += 1
+        if cached_plan is not None:
+            _PLAN_CACHE_HITS += 1
+            activity.logger.info(
+                f"Orchestrator reused a cached plan for a similar opening message "
+                f"({_PLAN_CACHE_HITS}/{_PLAN_CACHE_LOOKUPS} plan cache hits)"
+            )
+            return cached_plan
     
     # Prepare inputs - pass structured types instead of JSON strings
     conversation_history_str = "\n".join(input_data.chat_history) if input_data.chat_history else "No previous conversation"
@@ -191,10 +303,10 @@ async def orchestrator_planning_activity(input_data: OrchestratorInput) -> Execu
     )
     
     try:
-        result = await planner.acall(
+        result = await _PLANNER.acall(
             customer_message=input_data.customer_message,
             conversation_history=conversation_history_str,
-            customer_profile=input_data.customer_profile,  # Pass dict directly
+            customer_profile=format_customer_profile(input_data.customer_profile),
             available_agents=input_data.available_agents   # Pass list directly
         )
         
@@ -203,9 +315,7 @@ async def orchestrator_planning_activity(input_data: OrchestratorInput) -> Execu
         for step_output in result.steps:
             # Validate agent type
             agent_type = step_output.agent
-            try:
-                AgentType(agent_type)
-            except ValueError:
+            if agent_type not in _VALID_AGENT_TYPES:
                 activity.logger.warning(f"Invalid agent type '{agent_type}', using general_support")
                 agent_type = "general_support"
             
@@ -244,39 +354,64 @@ async def orchestrator_planning_activity(input_data: OrchestratorInput) -> Execu
         )
         activity.logger.info(f"Plan steps: {[(s.step_number, s.agent_type, s.context_references) for s in steps]}")
         
+        _PLAN_CACHE.store(plan_cache_key, execution_plan)
         return execution_plan
         
     except Exception as e:
         activity.logger.error(f"Orchestrator planning failed: {e}")
-        # Return fallback plan
-        return ExecutionPlan(
-            steps=[
-                ExecutionStep(
-                    step_number=1,
-                    agent_type="general_support",
-                    reason="Fallback plan due to orchestrator error",
-                    depends_on=[],
-                    context_references=[],
-                    priority=1
-                )
-            ],
-            strategy="sequential",
-            complexity_level="simple",
-            estimated_duration_seconds=10,
-            reasoning="Fallback to simple plan due to error"
-        )
+        return _FALLBACK_PLAN
 
 
 # ============================================================================
 # ORCHESTRATOR SYNTHESIS ACTIVITY
 # ============================================================================
 
+async def _stream_synthesis(synthesizer: dspy.Module, ticket_workflow_id: str, **inputs) -> dspy.Prediction:
+    """
+    Run synthesis while forwarding the final_response draft to the ticket workflow.
+    
+    Only final_response is streamed (reasoning and the other output fields are not). Each
+    signal carries only the text added since the last delivered one, with its offset in the
+    draft, and signals are throttled to RESPONSE_DRAFT_SIGNAL_INTERVAL, so the draft costs
+    workflow history roughly its own size once instead of once per signal.
+
+    The stream listener keeps per-stream state, so the streamified wrapper is built per call.
+    """
+    handle = activity.client().get_workflow_handle(ticket_workflow_id)
+    streaming_synthesizer = dspy.streamify(
+        synthesizer,
+        stream_listeners=[dspy.streaming.StreamListener(signature_field_name="final_response")],
+        is_async_program=True,
+    )
+    
+    draft = ""
+    sent = 0  # Length of the draft the workflow already has
+    last_signal = 0.0
+    prediction = None
+    # StreamListener recognizes adapters by class name, so stream through the stock JSONAdapter
+    with dspy.context(adapter=dspy.JSONAdapter()):
+        async for chunk in streaming_synthesizer(**inputs):
+            if isinstance(chunk, dspy.streaming.StreamResponse):
+                draft += chunk.chunk
+                if time.monotonic() - last_signal >= RESPONSE_DRAFT_SIGNAL_INTERVAL:
+                    last_signal = time.monotonic()
+                    try:
+                        await handle.signal("appendResponseDraft", args=[sent, draft[sent:]])
+                        sent = len(draft)
+                    except Exception as e:
+                        activity.logger.warning(f"Failed to signal response draft: {e}")
+            elif isinstance(chunk, dspy.Prediction):
+                prediction = chunk
+    
+    return prediction
+
 @activity.defn
 async def orchestrator_synthesis_activity(
     customer_message: str,
     execution_plan: ExecutionPlan,
     agent_results: List[AgentExecutionResult],
-    conversation_context: str
+    conversation_context: str,
+    ticket_workflow_id: str = ""
 ) -> OrchestratorOutput:
     """
     Synthesize agent outputs into coherent response.
@@ -287,12 +422,13 @@ async def orchestrator_synthesis_activity(
     3. Creates natural conversational response
     4. Determines if escalation or followup needed
     5. Provides reasoning for synthesis decisions
-    """
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Use ChainOfThought for thoughtful synthesis
-    synthesizer = dspy.ChainOfThought(OrchestratorSynthesis)
     
+    When ticket_workflow_id is given, the final response is streamed to that
+    workflow as a draft while it is being generated.
+    """
+    # streamify runs the synthesizer in a child task; its LM calls must land in this activity's history
+    start_llm_history()
+
     # Prepare execution plan as structured dict
     execution_plan_dict = {
         "steps": [
@@ -325,13 +461,34 @@ async def orchestrator_synthesis_activity(
         f"Orchestrator synthesizing {len(agent_results)} agent responses"
     )
     
+    # Agent results and context must match exactly; only the customer message may be a paraphrase
+    synthesis_cache_key = None
+    if ORCHESTRATOR_SYNTHESIS_CACHE:
+        results_digest = hashlib.blake2b(
+            "||".join([conversation_context] + [r.response for r in sorted(agent_results, key=lambda r: r.step_number)]).encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        cached_output, synthesis_cache_key = await _SYNTHESIS_CACHE.lookup(results_digest, customer_message)
+        if cached_output is not None:
+            activity.logger.info("Orchestrator synthesis answered from cache")
+            return dataclasses.replace(
+                cached_output,
+                execution_plan=execution_plan,
+                agent_results=agent_results,
+                llm_history=""
+            )
+    
     try:
-        result = await synthesizer.acall(
+        synthesis_inputs = dict(
             customer_message=customer_message,
             execution_plan=execution_plan_dict,      # Pass dict directly
             agent_results=agent_results_list,        # Pass list directly
             conversation_context=conversation_context
         )
+        if ticket_workflow_id:
+            result = await _stream_synthesis(_SYNTHESIZER, ticket_workflow_id, **synthesis_inputs)
+        else:
+            result = await _SYNTHESIZER.acall(**synthesis_inputs)
         
         serialized_history = capture_llm_history()
         
@@ -384,6 +541,7 @@ async def orchestrator_synthesis_activity(
             f"requires_followup={orchestrator_output.requires_followup}"
         )
         
+        _SYNTHESIS_CACHE.store(synthesis_cache_key, orchestrator_output)
         return orchestrator_output
         
     except Exception as e:
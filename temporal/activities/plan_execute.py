@@ -0,0 +1,122 @@
+"""Plan-and-Execute runner for agents whose tool sequence is known up front.
+
+Instead of ReAct's think-call-observe loop (one LM call per tool call), the LM
+plans every tool call once, the plan is run in Python with no LM calls between
+steps, and a single synthesis call turns the tool results into the agent's
+output: two LM calls for an N-step task instead of roughly N+1.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import dspy
+import orjson
+from pydantic import BaseModel, Field
+
+
+class PlanStep(BaseModel):
+    tool_name: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+
+class PlanSignature(dspy.Signature):
+    """
+    Plan, in order, every tool call needed to complete the agent task below.
+
+    The plan is executed exactly as written without consulting you between steps,
+    so every argument must be known now from the task inputs; results of earlier
+    steps are not available to later ones. Only use the listed tools.
+
+    Set requires_clarification to true (and leave steps empty) when the task needs
+    information the customer has not given yet, such as missing measurements or an
+    unchosen product, or when the task cannot be completed with these tools alone.
+    """
+    agent_instructions: str = dspy.InputField(desc="Instructions of the agent whose tools are being planned")
+    available_tools: str = dspy.InputField(desc="Tool names, descriptions and argument schemas")
+    task_inputs: str = dspy.InputField(desc="JSON object of the agent's inputs")
+
+    steps: List[PlanStep] = dspy.OutputField(desc="Tool calls to make, in order")
+    requires_clarification: bool = dspy.OutputField(desc="Whether the customer must be asked for more information first")
+
+
+# Planner and synthesizer per agent signature
+_PLANNERS: Dict[Type[dspy.Signature], dspy.Predict] = {}
+_SYNTHESIZERS: Dict[Type[dspy.Signature], dspy.Predict] = {}
+
+# Plannable tools by name and their rendered descriptions, keyed by tool identities,
+# alongside the tools themselves so their ids cannot be reused
+_TOOL_CATALOGS: Dict[Tuple[int, ...], Tuple[Dict[str, dspy.Tool], str, List[Any]]] = {}
+
+
+def _get_tool_catalog(tools: Sequence[Any]) -> Tuple[Dict[str, dspy.Tool], str]:
+    key = tuple(id(tool) for tool in tools)
+    catalog = _TOOL_CATALOGS.get(key)
+    if catalog is None:
+        tools_by_name = {tool.name: tool for tool in tools if isinstance(tool, dspy.Tool)}
+        descriptions = "\n".join(str(tool) for tool in tools_by_name.values())
+        catalog = _TOOL_CATALOGS[key] = (tools_by_name, descriptions, list(tools))
+    return catalog[0], catalog[1]
+
+
+def _get_synthesizer(signature: Type[dspy.Signature]) -> dspy.Predict:
+    synthesizer = _SYNTHESIZERS.get(signature)
+    if synthesizer is None:
+        synthesizer = dspy.Predict(signature.append(
+            "executed_steps",
+            dspy.InputField(desc="JSON list of the tool calls already made, with their results"),
+            type_=str
+        ))
+        _SYNTHESIZERS[signature] = synthesizer
+    return synthesizer
+
+
+async def plan_and_execute(
+    signature: Type[dspy.Signature],
+    tools: Sequence[Any],
+    inputs: Dict[str, Any],
+) -> Optional[dspy.Prediction]:
+    """Run ``signature`` as plan, deterministic tool calls, then one synthesis call.
+
+    Only ``dspy.Tool`` instances in ``tools`` can be planned; pass the user
+    interaction tools separately to ReAct instead, since a question's answer cannot
+    feed later steps of a fixed plan. Returns None, without calling any tool, when
+    the planner asks for clarification or names an unknown tool; the caller then
+    falls back to ReAct. A failing tool stops the plan and its error is handed to
+    the synthesis step like any other result.
+
+    The prediction carries ``tool_results``: each tool's last result by tool name.
+    """
+    tools_by_name, tool_descriptions = _get_tool_catalog(tools)
+
+    planner = _PLANNERS.get(signature)
+    if planner is None:
+        planner = _PLANNERS[signature] = dspy.Predict(PlanSignature)
+    plan = await planner.acall(
+        agent_instructions=signature.instructions,
+        available_tools=tool_descriptions,
+        task_inputs=orjson.dumps(inputs, default=str).decode()
+    )
+
+    if plan.requires_clarification or not plan.steps:
+        return None
+    if any(step.tool_name not in tools_by_name for step in plan.steps):
+        return None
+
+    executed_steps: List[Dict[str, Any]] = []
+    tool_results: Dict[str, Any] = {}
+    for step in plan.steps:
+        try:
+            result = await tools_by_name[step.tool_name].acall(**step.args)
+        except Exception as e:
+            executed_steps.append({"tool": step.tool_name, "args": step.args, "error": str(e)})
+            break
+        executed_steps.append({"tool": step.tool_name, "args": step.args, "result": result})
+        tool_results[step.tool_name] = result
+
+    prediction = await _get_synthesizer(signature).acall(
+        **inputs,
+        executed_steps=orjson.dumps(executed_steps, default=str).decode()
+    )
+    prediction.tool_results = tool_results
+    return prediction
@@ -1,19 +1,13 @@
 """Refund Specialist Activity"""
 
-from typing import Any, Dict, List
-
 import dspy
-from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.utils import make_react_activity
 from data.agent_models import RefundSpecialistInput, RefundSpecialistOutput
 from data.base_models import AgentType
 
-# Import MCP manager for dynamic tool loading
-from mcp_integration import mcp_manager
-
 # Import static tools (user interaction tools)
-from activities.tools.user_interaction_tools import ask_user_question, validate_user_response, set_workflow_context
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
 
 class RefundSpecialistResponse(dspy.Signature):
     """
@@ -42,10 +36,10 @@ class RefundSpecialistResponse(dspy.Signature):
     - Return label: [label ID]
     - Timeline: 5-7 business days after we receive the item"
     """
-    refund_request: str = dspy.InputField()
-    conversation_context: str = dspy.InputField()
     customer_id: str = dspy.InputField()
     customer_profile: str = dspy.InputField()
+    conversation_context: str = dspy.InputField()
+    refund_request: str = dspy.InputField()
     
     response: str = dspy.OutputField(desc="Refund specialist response")
     confidence: float = dspy.OutputField(desc="Response confidence 0-1")
@@ -54,55 +48,12 @@ class RefundSpecialistResponse(dspy.Signature):
     required_documentation: str = dspy.OutputField(desc="Documents needed")
     processing_timeline: str = dspy.OutputField(desc="Expected processing time")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
-
-@activity.defn
-async def refund_specialist_activity(input_data: RefundSpecialistInput) -> RefundSpecialistOutput:
-    """Refund specialist agent using DSPy.React with refund tools"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Set workflow context for user interaction tools
-    set_workflow_context(
-        ticket_workflow_id=input_data.ticket_workflow_id,
-        ticket_id=input_data.ticket_id,
-        agent_type="REFUND_SPECIALIST"
-    )
-    
-    # Get tools from MCP servers for this agent type
-    static_tools = [ask_user_question, validate_user_response]
-    
-    all_tools = await mcp_manager.get_tools_for_agent(
-        AgentType.REFUND_SPECIALIST,
-        include_static_tools=static_tools
-    )
-    activity.logger.info(f"Refund specialist using {len(all_tools)} tools from MCP")
-    
-    # Create React module with dynamically loaded tools
-    refund_react = dspy.ReAct(
-        RefundSpecialistResponse,
-        tools=all_tools
-    )
-    
-    # Convert customer_profile dict to string for ReAct compatibility
-    customer_profile_str = str(input_data.customer_profile) if input_data.customer_profile else "No profile data available"
-    
-    result = await refund_react.acall(
-        refund_request=input_data.refund_request,
-        conversation_context=input_data.conversation_context,
-        customer_id=input_data.customer_id,
-        customer_profile=customer_profile_str
-    )
-
-    serialized_history = capture_llm_history()
-    
-    return RefundSpecialistOutput(
-        response=result.response,
-        confidence=float(result.confidence),
-        requires_escalation=result.requires_escalation,
-        eligibility_assessment=result.eligibility_assessment,
-        required_documentation=result.required_documentation,  # Now expects str, not list
-        processing_timeline=result.processing_timeline,
-        llm_history=serialized_history,
-        tool_results=getattr(result, 'tool_results', {})
-    )
\ No newline at end of file
+refund_specialist_activity = make_react_activity(
+    "refund_specialist_activity",
+    RefundSpecialistResponse,
+    AgentType.REFUND_SPECIALIST,
+    RefundSpecialistInput,
+    RefundSpecialistOutput,
+    static_tools=list(SHARED_USER_TOOLS),
+    request_field="refund_request"
+)
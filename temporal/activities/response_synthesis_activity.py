@@ -3,9 +3,10 @@
 from typing import Any, Dict, List
 
 import dspy
+import orjson
 from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.utils import capture_llm_history, format_customer_profile, start_llm_history
 from data.interaction_models import SynthesisInput, SynthesisOutput, SpecialistResponse
 
 class ResponseSynthesis(dspy.Signature):
@@ -21,15 +22,13 @@ class ResponseSynthesis(dspy.Signature):
     requires_escalation: bool = dspy.OutputField(desc="Whether any specialist flagged need for escalation")
     synthesis_reasoning: str = dspy.OutputField(desc="Explanation of how responses were combined")
 
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
+_SYNTHESIS_PREDICTOR = dspy.Predict(ResponseSynthesis)
 
 @activity.defn
 async def response_synthesis_activity(input_data: SynthesisInput) -> SynthesisOutput:
     """Synthesize multiple specialist responses using DSPy"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Convert specialist responses to JSON string for DSPy
-    import json
+    start_llm_history()
+    # Convert specialist responses to compact JSON for DSPy
     specialist_data = [
         {
             "agent_type": resp.agent_type.value if hasattr(resp.agent_type, 'value') else str(resp.agent_type),
@@ -42,21 +41,19 @@ async def response_synthesis_activity(input_data: SynthesisInput) -> SynthesisOu
         for resp in input_data.specialist_responses
     ]
     
-    synthesis_predictor = dspy.Predict(ResponseSynthesis)
-    
-    result = await synthesis_predictor.acall(
+    result = await _SYNTHESIS_PREDICTOR.acall(
         customer_query=input_data.customer_query,
         conversation_context=input_data.conversation_context,
-        customer_profile=str(input_data.customer_profile),
-        specialist_responses=json.dumps(specialist_data, indent=2)
+        customer_profile=format_customer_profile(input_data.customer_profile),
+        specialist_responses=orjson.dumps(specialist_data, default=str).decode()
     )
 
     serialized_history = capture_llm_history()
     
     # Parse information sources
     try:
-        sources = json.loads(result.information_sources)
-    except (json.JSONDecodeError, Exception):
+        sources = orjson.loads(result.information_sources)
+    except Exception:
         sources = [f"Specialist {i+1}" for i in range(len(input_data.specialist_responses))]
     
     return SynthesisOutput(
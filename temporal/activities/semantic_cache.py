@@ -0,0 +1,114 @@
+"""Embedding-similarity cache for agent activity outputs.
+
+Agents are frequently asked near-identical questions ("shorten sleeves" vs
+"hem sleeves"). SemanticCache embeds the request text and, when a previous
+request from the same customer is close enough, hands back that request's
+output instead of running another ReAct loop against Gemini.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import litellm
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "gemini/text-embedding-004"
+
+# Tokens that change what a request asks for while barely moving its embedding:
+# anything containing a digit (order IDs, sizes like 32 or 10.5, quantities),
+# letter sizes and colours
+_IDENTIFIER_RE = re.compile(
+    r"\b(?:[a-z-]*\d[\w.-]*"
+    r"|xxs|xs|xl|xxl|xxxl|small|medium|large"
+    r"|black|white|grey|gray|red|blue|navy|green|olive|yellow|orange|pink|purple|brown|beige|cream|ivory|khaki|tan|burgundy|maroon|teal)\b"
+)
+
+
+def request_identifiers(text: str) -> Tuple[str, ...]:
+    """Sorted, de-duplicated identifiers in ``text``; include them in the cache partition so
+    requests that differ only in a size, colour or order ID never share an output."""
+    return tuple(sorted(set(_IDENTIFIER_RE.findall(text.lower()))))
+
+
+async def embed_normalized(texts: List[str]) -> np.ndarray:
+    """Embed ``texts`` with ``EMBEDDING_MODEL`` as unit-length rows, so dot products are cosine similarities."""
+    response = await litellm.aembedding(model=EMBEDDING_MODEL, input=texts)
+    embeddings = np.asarray([item["embedding"] for item in response.data], dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+class SemanticCache:
+    """Bounded LRU of (embedding, output) pairs partitioned by customer.
+
+    Parameters
+    ----------
+    maxsize: int, optional
+        Maximum number of entries kept across all customers, defaults to 512.
+    threshold: float, optional
+        Minimum cosine similarity for a cached output to be reused, defaults to 0.92.
+    """
+
+    def __init__(self, maxsize: int = 512, threshold: float = 0.92) -> None:
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[np.ndarray, Any]]" = OrderedDict()
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        normalized = " ".join(text.lower().split())
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    async def lookup(self, partition: Hashable, text: str) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        """Return ``(cached_output, key)`` for ``text``.
+
+        ``cached_output`` is None on a miss. ``key`` should be passed back to
+        :meth:`store`; it is None when the text could not be embedded, in
+        which case the cache is bypassed entirely.
+        """
+        digest = self._digest(text)
+        exact = self._entries.get((partition, digest))
+        if exact is not None:
+            self._entries.move_to_end((partition, digest))
+            return exact[1], None
+
+        try:
+            embedding = (await embed_normalized([text]))[0]
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed, bypassing cache: {e}")
+            return None, None
+
+        if not embedding.any():
+            return None, None
+        key = {"partition": partition, "digest": digest, "embedding": embedding}
+
+        candidates = [entry_key for entry_key in self._entries if entry_key[0] == partition]
+        if not candidates:
+            return None, key
+
+        matrix = np.stack([self._entries[entry_key][0] for entry_key in candidates])
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] <= self.threshold:
+            return None, key
+
+        self._entries.move_to_end(candidates[best])
+        logger.info(f"Semantic cache hit for {partition} (similarity {scores[best]:.3f})")
+        return self._entries[candidates[best]][1], key
+
+    def store(self, key: Optional[Dict[str, Any]], output: Any) -> None:
+        """Remember ``output`` under a key returned by :meth:`lookup`."""
+        if key is None:
+            return
+        self._entries[(key["partition"], key["digest"])] = (key["embedding"], output)
+        self._entries.move_to_end((key["partition"], key["digest"]))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -1,19 +1,13 @@
 """Technical Specialist Activity"""
 
-from typing import Any, Dict, List
-
 import dspy
-from temporalio import activity
 
-from activities.utils import capture_llm_history
+from activities.utils import make_react_activity
 from data.agent_models import TechnicalSpecialistInput, TechnicalSpecialistOutput
 from data.base_models import AgentType
 
-# Import MCP manager for dynamic tool loading
-from mcp_integration import mcp_manager
-
 # Import static tools (user interaction tools)
-from activities.tools.user_interaction_tools import ask_user_question, validate_user_response, set_workflow_context
+from activities.tools.user_interaction_tools import SHARED_USER_TOOLS
 
 class TechnicalSpecialistResponse(dspy.Signature):
     """
@@ -39,10 +33,10 @@ class TechnicalSpecialistResponse(dspy.Signature):
     3. [Step 3]
     Let me know if this resolves your issue or if you need further assistance."
     """
-    issue_description: str = dspy.InputField()
-    conversation_context: str = dspy.InputField()
     customer_id: str = dspy.InputField()
     customer_profile: str = dspy.InputField()
+    conversation_context: str = dspy.InputField()
+    issue_description: str = dspy.InputField()
     
     response: str = dspy.OutputField(desc="Technical support response")
     confidence: float = dspy.OutputField(desc="Response confidence 0-1")
@@ -50,54 +44,12 @@ class TechnicalSpecialistResponse(dspy.Signature):
     troubleshooting_steps: str = dspy.OutputField(desc="Step-by-step solution")
     estimated_resolution_time: str = dspy.OutputField(desc="Expected time to resolve")
 
-# Global LM configuration
-_GLOBAL_LM = dspy.LM("gemini/gemini-2.5-flash")
-
-@activity.defn
-async def technical_specialist_activity(input_data: TechnicalSpecialistInput) -> TechnicalSpecialistOutput:
-    """Technical specialist agent using DSPy.React with technical tools"""
-    dspy.context(lm=_GLOBAL_LM)
-    
-    # Set workflow context for user interaction tools
-    set_workflow_context(
-        ticket_workflow_id=input_data.ticket_workflow_id,
-        ticket_id=input_data.ticket_id,
-        agent_type="TECHNICAL_SPECIALIST"
-    )
-    
-    # Get tools from MCP servers for this agent type
-    static_tools = [ask_user_question, validate_user_response]
-    
-    all_tools = await mcp_manager.get_tools_for_agent(
-        AgentType.TECHNICAL_SPECIALIST,
-        include_static_tools=static_tools
-    )
-    activity.logger.info(f"Technical specialist using {len(all_tools)} tools from MCP")
-    
-    # Create React module with dynamically loaded tools
-    tech_react = dspy.ReAct(
-        TechnicalSpecialistResponse,
-        tools=all_tools
-    )
-    
-    # Convert customer_profile dict to string for ReAct compatibility
-    customer_profile_str = str(input_data.customer_profile) if input_data.customer_profile else "No profile data available"
-    
-    result = await tech_react.acall(
-        issue_description=input_data.issue_description,
-        conversation_context=input_data.conversation_context,
-        customer_id=input_data.customer_id,
-        customer_profile=customer_profile_str
-    )
-
-    serialized_history = capture_llm_history()
-    
-    return TechnicalSpecialistOutput(
-        response=result.response,
-        confidence=float(result.confidence),
-        requires_escalation=result.requires_escalation,
-        troubleshooting_steps=result.troubleshooting_steps,  # Now expects str, not list
-        estimated_resolution_time=result.estimated_resolution_time,
-        llm_history=serialized_history,
-        tool_results=getattr(result, 'tool_results', {})
-    )
\ No newline at end of file
+technical_specialist_activity = make_react_activity(
+    "technical_specialist_activity",
+    TechnicalSpecialistResponse,
+    AgentType.TECHNICAL_SPECIALIST,
+    TechnicalSpecialistInput,
+    TechnicalSpecialistOutput,
+    static_tools=list(SHARED_USER_TOOLS),
+    request_field="issue_description"
+)
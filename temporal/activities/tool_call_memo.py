@@ -0,0 +1,127 @@
+"""Per-run memoization of tool calls.
+
+Within a single ReAct run the model often repeats a lookup it already made
+(``get_delivery_options()`` twice, the same ``check_order_status`` call after
+thinking). Read-only tools wrapped with :func:`scoped_memoize` answer repeats
+from a memo that lives only for the current agent run; tools that change state
+clear the memo so later reads see the change.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+
+# Tool results of the current agent run, keyed by tool name and arguments. None
+# outside a run, in which case the wrappers call straight through.
+_TOOL_CALL_MEMO: ContextVar[Optional[Dict[Tuple[str, bytes], Any]]] = ContextVar("tool_call_memo", default=None)
+
+# Memo entry recording that a state-changing tool ran during the current run
+_STATE_CHANGED = ("__state_changed__", b"")
+
+# Memo entry recording that the customer was asked something during the current run
+_ASKED_USER = ("__asked_user__", b"")
+
+# Tools with these name prefixes only read data and are safe to memoize
+READ_ONLY_TOOL_PREFIXES = (
+    "get_", "list_", "search_", "check_", "calculate_", "compare_", "retrieve_", "track_", "recommend_"
+)
+
+
+def start_tool_call_scope() -> None:
+    """Start a fresh memo for the current task (one agent run)."""
+    _TOOL_CALL_MEMO.set({})
+
+
+def run_changed_state() -> bool:
+    """Whether a state-changing tool has been called during the current run."""
+    memo = _TOOL_CALL_MEMO.get()
+    return bool(memo and memo.get(_STATE_CHANGED))
+
+
+def run_asked_user() -> bool:
+    """Whether a user interaction tool has been called during the current run."""
+    memo = _TOOL_CALL_MEMO.get()
+    return bool(memo and memo.get(_ASKED_USER))
+
+
+def _memo_key(name: str, args: tuple, kwargs: dict) -> Tuple[str, bytes]:
+    return name, orjson.dumps([args, kwargs], option=orjson.OPT_SORT_KEYS, default=str)
+
+
+def scoped_memoize(func: Callable, name: Optional[str] = None) -> Callable:
+    """Memoize ``func`` (sync or async) for the duration of the current agent run."""
+    name = name or func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            memo = _TOOL_CALL_MEMO.get()
+            if memo is None:
+                return await func(*args, **kwargs)
+            key = _memo_key(name, args, kwargs)
+            if key not in memo:
+                memo[key] = await func(*args, **kwargs)
+            return memo[key]
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        memo = _TOOL_CALL_MEMO.get()
+        if memo is None:
+            return func(*args, **kwargs)
+        key = _memo_key(name, args, kwargs)
+        if key not in memo:
+            memo[key] = func(*args, **kwargs)
+        return memo[key]
+    return wrapper
+
+
+def invalidating(func: Callable) -> Callable:
+    """Wrap a state-changing tool so calling it clears the current run's memo and marks the run as stateful."""
+    def invalidate():
+        memo = _TOOL_CALL_MEMO.get()
+        if memo is not None:
+            asked_user = memo.get(_ASKED_USER)
+            memo.clear()
+            memo[_STATE_CHANGED] = True
+            if asked_user:
+                memo[_ASKED_USER] = True
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            invalidate()
+            return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        invalidate()
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def asks_user(func: Callable) -> Callable:
+    """Wrap a user interaction tool so calling it marks the current run as depending on the customer's answers."""
+    def mark():
+        memo = _TOOL_CALL_MEMO.get()
+        if memo is not None:
+            memo[_ASKED_USER] = True
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            mark()
+            return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        mark()
+        return func(*args, **kwargs)
+    return wrapper
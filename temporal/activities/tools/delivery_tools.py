@@ -9,6 +9,7 @@ from data.persistent_data import (
     schedule_delivery,
     get_delivery_schedules
 )
+from activities.tool_call_memo import scoped_memoize
 
 def get_delivery_options() -> Dict[str, Any]:
     """Get available delivery options with costs and timelines"""
@@ -90,6 +91,17 @@ def calculate_delivery_date(delivery_option: str) -> Dict[str, Any]:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@scoped_memoize
+def compare_delivery_options() -> Dict[str, Any]:
+    """Calculate cost and expected delivery date for every delivery option in one call"""
+    try:
+        return {
+            "success": True,
+            "options": [calculate_delivery_date(option) for option in DELIVERY_OPTIONS]
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 def schedule_purchase_delivery(purchase_id: str, delivery_option: str, address: Dict[str, str]) -> Dict[str, Any]:
     """Schedule delivery for a purchase"""
     try:
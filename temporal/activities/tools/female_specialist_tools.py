@@ -9,6 +9,7 @@ from data.persistent_data import (
     save_measurements,
     get_measurements
 )
+from activities.tool_call_memo import scoped_memoize
 
 def list_female_shirts_inventory() -> Dict[str, Any]:
     """List all available shirts/blouses in inventory for female customers with details"""
@@ -258,3 +259,17 @@ def recommend_size_female(measurements: Dict[str, float], product_id: str) -> Di
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+@scoped_memoize
+def recommend_sizes_female(measurements: Dict[str, float], product_ids: List[str]) -> Dict[str, Any]:
+    """Recommend sizes for several candidate products in one call"""
+    try:
+        return {
+            "success": True,
+            "recommendations": {
+                product_id: recommend_size_female(measurements, product_id)
+                for product_id in product_ids
+            }
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
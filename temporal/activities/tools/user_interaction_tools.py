@@ -1,20 +1,26 @@
 """User Interaction Tools - Allow agents to ask questions and receive responses from customers"""
 
 from typing import Dict, Any, Optional
+from contextvars import ContextVar
 import os
 import uuid
 from datetime import timedelta
-from temporalio.client import Client
+import dspy
+from temporalio import activity
+from activities.tool_call_memo import asks_user
 from data.interaction_models import UserQuestion
 
-# Global storage for workflow context (will be set by specialist workflows)
-_workflow_context: Dict[str, Any] = {}
+# Workflow context for the current activity (set by specialist activities). Each activity
+# runs in its own task, so concurrent activities sharing a ReAct module see their own values.
+_workflow_context: ContextVar[Dict[str, Any]] = ContextVar("workflow_context", default={})
 
 def set_workflow_context(ticket_workflow_id: str, ticket_id: str, agent_type: str):
     """Set workflow context for user interaction"""
-    _workflow_context['ticket_workflow_id'] = ticket_workflow_id
-    _workflow_context['ticket_id'] = ticket_id
-    _workflow_context['agent_type'] = agent_type
+    _workflow_context.set({
+        'ticket_workflow_id': ticket_workflow_id,
+        'ticket_id': ticket_id,
+        'agent_type': agent_type
+    })
 
 
 async def ask_user_question(
@@ -44,9 +50,10 @@ async def ask_user_question(
     """
     try:
         # Get workflow context
-        ticket_workflow_id = _workflow_context.get('ticket_workflow_id', 'unknown')
-        ticket_id = _workflow_context.get('ticket_id', 'unknown')
-        agent_type = _workflow_context.get('agent_type', 'SYSTEM')
+        context = _workflow_context.get()
+        ticket_workflow_id = context.get('ticket_workflow_id', 'unknown')
+        ticket_id = context.get('ticket_id', 'unknown')
+        agent_type = context.get('agent_type', 'SYSTEM')
         
         if ticket_workflow_id == 'unknown' or ticket_id == 'unknown':
             return {
@@ -57,9 +64,8 @@ async def ask_user_question(
         # Generate unique question workflow ID
         question_workflow_id = f"{ticket_id}-question-{uuid.uuid4()}"
         
-        # Connect to Temporal
-        temporal_address = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
-        client = await Client.connect(temporal_address)
+        # Reuse the worker's Temporal client (tools only run inside agent activities)
+        client = activity.client()
         
         # Import here to avoid circular dependency
         from workflows.user_question_workflow import UserQuestionWorkflow
@@ -106,7 +112,7 @@ def get_pending_user_response(question_id: str) -> Dict[str, Any]:
         Dict with response if available, or pending status
     """
     try:
-        responses = _workflow_context.get('question_responses', {})
+        responses = _workflow_context.get().get('question_responses', {})
         
         if question_id in responses:
             return {
@@ -164,3 +170,9 @@ def validate_user_response(
             
     except Exception as e:
         return {"valid": False, "message": f"Validation error: {str(e)}"}
+
+
+# dspy.Tool wrappers are built once per process (signature introspection and JSON schema)
+# and shared by every agent's ReAct module. Runs that call them depend on the customer's
+# answers, so their outputs are never cached.
+SHARED_USER_TOOLS = (dspy.Tool(asks_user(ask_user_question)), dspy.Tool(asks_user(validate_user_response)))
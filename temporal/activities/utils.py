@@ -2,30 +2,392 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import io
+import logging
 import re
+import time
+import typing
 from contextlib import redirect_stdout
+from contextvars import ContextVar
+from dataclasses import fields
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Type
 
-from dspy.clients.base_lm import GLOBAL_HISTORY
+import dspy
+import orjson
+from cachetools import TTLCache
 from dspy.utils.inspect_history import pretty_print_history
+from temporalio import activity
+
+from activities.plan_execute import plan_and_execute
+from activities.semantic_cache import SemanticCache, request_identifiers
+from activities.tool_call_memo import (
+    READ_ONLY_TOOL_PREFIXES,
+    invalidating,
+    run_asked_user,
+    run_changed_state,
+    scoped_memoize,
+    start_tool_call_scope,
+)
+from activities.tools.user_interaction_tools import set_workflow_context
+from data.base_models import AgentType
+from mcp_integration import mcp_manager
+
+logger = logging.getLogger(__name__)
 
 _ANSI_ESCAPE_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
 
+# ReAct modules keyed by signature and tool identities, alongside the tools they were built from
+_REACT_MODULES: Dict[Tuple[Any, ...], Tuple[dspy.ReAct, List[Any]]] = {}
+
+# Tool lists keyed by agent type and static tool identities: (MCP connection generation, load time, tools)
+MCP_TOOLS_TTL_SECONDS = 60.0
+_MCP_TOOLS_CACHE: Dict[Tuple[Any, ...], Tuple[int, float, List[Any]]] = {}
+_MCP_TOOLS_LOCK = asyncio.Lock()
+
+# Every factory-built agent as (signature, agent type, static tools), for prebuild_react_modules
+_REACT_AGENTS: List[Tuple[Type[dspy.Signature], AgentType, List[Any]]] = []
+
+# Outputs of identical ReAct requests, keyed by exact_cache_key
+_REACT_RESPONSE_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=3600)
+
+# Memoizing copies of MCP tools keyed by the original tool's id, alongside the original
+_MEMOIZED_TOOLS: Dict[int, Tuple[Any, dspy.Tool]] = {}
+
+# LM history entries recorded by the current activity. Every activity runs in its own
+# task and sets its list with start_llm_history on entry, so lists are never shared.
+_ACTIVITY_LLM_HISTORY: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("activity_llm_history", default=None)
+
+
+def start_llm_history() -> None:
+    """Give the current activity a fresh LM history list.
+
+    Call in the activity's own task before any LM call: child tasks (dspy.streamify,
+    asyncio.gather) copy the context, so they append to this same list instead of
+    creating one the activity never sees.
+    """
+    _ACTIVITY_LLM_HISTORY.set([])
+
+
+def record_llm_history(entry: Dict[str, Any]) -> None:
+    """Append an LM history entry to the current activity's history, if it started one."""
+    history = _ACTIVITY_LLM_HISTORY.get()
+    if history is not None:
+        history.append(entry)
+
 
 def capture_llm_history(n: int = 1) -> str:
-    """Return the most recent DSPy LM interaction history as plain text.
+    """Return the current activity's most recent DSPy LM interactions as plain text.
+
+    Entries come from the per-activity history filled by ``record_llm_history``, so
+    concurrent activities don't pick up each other's calls. Returns "" when the
+    activity made no LM calls (or never called ``start_llm_history``).
 
     Parameters
     ----------
     n: int, optional
         Number of history entries to include, defaults to 1 (most recent only).
     """
-    if not GLOBAL_HISTORY:
+    history = _ACTIVITY_LLM_HISTORY.get()
+    if not history:
         return ""
 
     buffer = io.StringIO()
     with redirect_stdout(buffer):
-        pretty_print_history(GLOBAL_HISTORY, n=n)
+        pretty_print_history(history, n=n)
 
     history_output = buffer.getvalue()
     return _ANSI_ESCAPE_RE.sub("", history_output).strip()
+
+
+def format_customer_profile(profile: Optional[Dict[str, Any]]) -> str:
+    """Serialize a customer profile for a prompt as compact JSON with sorted keys.
+
+    Sorted keys keep the text byte-identical across calls for the same customer,
+    which keeps it inside Gemini's cached prompt prefix. Every prompt that shows
+    the profile goes through here, so all agents see the same text.
+    """
+    return orjson.dumps(profile or {}, option=orjson.OPT_SORT_KEYS, default=str).decode()
+
+
+def get_react_module(signature: Type[dspy.Signature], tools: List[Any]) -> dspy.ReAct:
+    """Return a shared ``dspy.ReAct`` for ``signature`` over exactly these ``tools``.
+
+    MCP tools are cached per server, so the same tool objects come back on every
+    activity call and the module (signature parsing, tool schema introspection,
+    predictor setup) is only built once. A reconnect yields new tool objects and
+    therefore a fresh module. Per-request state such as the ticket workflow ID is
+    carried by ``set_workflow_context``'s ContextVar, not by the module.
+    """
+    key = (signature, *(id(tool) for tool in tools))
+    cached = _REACT_MODULES.get(key)
+    if cached is None:
+        # Keep the tools referenced so their ids cannot be reused by other objects
+        cached = (dspy.ReAct(signature, tools=tools), list(tools))
+        _REACT_MODULES[key] = cached
+    return cached[0]
+
+
+def memoize_tools(tools: List[Any], static_tools: Sequence[Any] = ()) -> List[Any]:
+    """Return ``tools`` with every MCP tool wrapped for per-run memoization.
+
+    Read-only tools (by name prefix) answer repeated calls with the same arguments
+    from the current run's memo; every other MCP tool clears the memo when called.
+    ``static_tools`` are passed through untouched. Wrapped copies are cached, so
+    the returned list is stable across calls and keeps ``get_react_module`` hits.
+    """
+    static_ids = {id(tool) for tool in static_tools}
+    wrapped_tools = []
+    for tool in tools:
+        if id(tool) in static_ids or not isinstance(tool, dspy.Tool):
+            wrapped_tools.append(tool)
+            continue
+        cached = _MEMOIZED_TOOLS.get(id(tool))
+        if cached is None:
+            if tool.name.startswith(READ_ONLY_TOOL_PREFIXES):
+                func = scoped_memoize(tool.func, name=tool.name)
+            else:
+                func = invalidating(tool.func)
+            cached = (tool, tool.model_copy(update={"func": func}))
+            _MEMOIZED_TOOLS[id(tool)] = cached
+        wrapped_tools.append(cached[1])
+    return wrapped_tools
+
+
+async def get_agent_tools(agent_type: AgentType, static_tools: Sequence[Any]) -> List[Any]:
+    """Return the (memoizing) MCP tools plus ``static_tools`` for ``agent_type``.
+
+    The list is loaded once per agent type and static tool set and reused for
+    ``MCP_TOOLS_TTL_SECONDS``; reconnecting the MCP manager invalidates it
+    immediately. Nothing is cached before the MCP connections are up, so a worker
+    that is still starting doesn't pin a static-only tool list.
+    """
+    key = (agent_type, *(id(tool) for tool in static_tools))
+    generation = mcp_manager.generation
+    cached = _MCP_TOOLS_CACHE.get(key)
+    if cached and cached[0] == generation and time.monotonic() - cached[1] < MCP_TOOLS_TTL_SECONDS:
+        logger.debug(f"Tool cache hit for {agent_type.value}")
+        return cached[2]
+
+    async with _MCP_TOOLS_LOCK:
+        cached = _MCP_TOOLS_CACHE.get(key)
+        if cached and cached[0] == generation and time.monotonic() - cached[1] < MCP_TOOLS_TTL_SECONDS:
+            return cached[2]
+
+        tools = memoize_tools(
+            await mcp_manager.get_tools_for_agent(agent_type, include_static_tools=list(static_tools)),
+            static_tools
+        )
+        if mcp_manager.is_initialized:
+            _MCP_TOOLS_CACHE[key] = (generation, time.monotonic(), tools)
+        return tools
+
+
+async def prebuild_react_modules() -> None:
+    """Load every registered agent's tools and build its ReAct module ahead of the first ticket.
+
+    Call once at worker startup, after the MCP connections are up. Failures are
+    logged and left to the first activity call to retry.
+    """
+    for signature, agent_type, static_tools in _REACT_AGENTS:
+        try:
+            get_react_module(signature, await get_agent_tools(agent_type, static_tools))
+        except Exception as e:
+            logger.warning(f"Could not prebuild ReAct module for {agent_type.value}: {e}")
+
+
+def signature_version(signature: Type[dspy.Signature]) -> str:
+    """Short hash of a signature's instructions and fields; changes whenever the prompt would."""
+    fields_text = ",".join(f"{name}:{field.annotation}" for name, field in signature.fields.items())
+    return hashlib.blake2b(f"{signature.instructions}|{fields_text}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def exact_cache_key(version: str, **inputs: Any) -> str:
+    """Key for ``_REACT_RESPONSE_CACHE``: the signature version plus the exact, whitespace-normalized inputs."""
+    normalized = {name: " ".join(value.split()) if isinstance(value, str) else value for name, value in inputs.items()}
+    payload = orjson.dumps([version, normalized], option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def context_digest(text: str) -> str:
+    """Short hash of whitespace-normalized ``text``, for exact-match cache partitions."""
+    return hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def make_react_activity(
+    name: str,
+    signature: Type[dspy.Signature],
+    agent_type: AgentType,
+    input_model: type,
+    output_model: type,
+    static_tools: Sequence[Any],
+    request_field: str,
+    cache: Optional[SemanticCache] = None,
+    cache_per_context: bool = False,
+    stateful_field: Optional[str] = None,
+    exact_cache: bool = False,
+    plan_first: bool = False,
+    fast_path: Optional[Callable[[Any], Awaitable[Optional[Any]]]] = None,
+    max_iters: Optional[int] = None,
+) -> Callable[[Any], Awaitable[Any]]:
+    """Build the Temporal activity for a ReAct specialist agent.
+
+    Every specialist runs the same steps: set the workflow context for the user
+    interaction tools, load its MCP tools, run ``signature`` through ReAct and copy
+    the prediction into ``output_model``. Everything that doesn't depend on the
+    request (tool list, output field mapping) is resolved here, once per agent.
+
+    Parameters
+    ----------
+    name: str
+        Activity name registered with Temporal.
+    signature: Type[dspy.Signature]
+        ReAct signature; takes customer_id, customer_profile, conversation_context
+        and ``request_field`` as inputs.
+    agent_type: AgentType
+        Agent whose MCP tools are loaded.
+    input_model, output_model: type
+        Activity input and output dataclasses.
+    static_tools: Sequence[Any]
+        Non-MCP tools the agent always gets.
+    request_field: str
+        Name of the request text field, shared by ``input_model`` and ``signature``.
+    cache: SemanticCache, optional
+        Cache for outputs of near-duplicate requests, defaults to no caching.
+        Only the request text is embedded; outputs are partitioned by customer and
+        by the identifiers in the request and the conversation context.
+    cache_per_context: bool, optional
+        Also partition ``cache`` by a digest of the whole conversation context, so
+        only paraphrases asked against the same conversation share an output,
+        defaults to False.
+    stateful_field: str, optional
+        Boolean output field that marks a result as having changed persisted
+        state; such results (and escalations) are never cached.
+    exact_cache: bool, optional
+        Reuse outputs of byte-identical requests (same customer, profile, context
+        and request) for up to an hour, defaults to False.
+    plan_first: bool, optional
+        Try ``plan_and_execute`` over the MCP tools first and only run ReAct when
+        the planner needs the customer to clarify, defaults to False.
+    fast_path: async callable, optional
+        Called with the activity input before the semantic cache and ReAct; an
+        ``output_model`` it returns is used as the result, None runs the agent.
+    max_iters: int, optional
+        Cap on ReAct steps (tool calls, including finish); a run that hits it
+        without finishing is flagged ``requires_escalation``. Defaults to
+        ReAct's own limit.
+    """
+    static_tools = list(static_tools)
+    static_ids = {id(tool) for tool in static_tools}
+    agent_name = agent_type.value.replace("_", " ")
+    version = signature_version(signature)
+    _REACT_AGENTS.append((signature, agent_type, static_tools))
+
+    # Output fields copied from the prediction, with the float fields coerced
+    output_types = typing.get_type_hints(output_model)
+    output_fields = [
+        (field.name, output_types[field.name] is float)
+        for field in fields(output_model)
+        if field.name not in ("llm_history", "tool_results")
+    ]
+
+    def cacheable(output) -> bool:
+        # Never replay results that escalated, changed persisted state or depended on the customer's answers
+        return not (
+            output.requires_escalation
+            or (stateful_field and getattr(output, stateful_field))
+            or run_changed_state()
+            or run_asked_user()
+        )
+
+    async def run(input_data):
+        start_llm_history()
+        request = getattr(input_data, request_field)
+        react_inputs = {
+            "customer_id": input_data.customer_id,
+            "customer_profile": format_customer_profile(input_data.customer_profile),
+            "conversation_context": input_data.conversation_context,
+            request_field: request,
+        }
+
+        exact_key = None
+        if exact_cache:
+            exact_key = exact_cache_key(version, **react_inputs)
+            cached_output = _REACT_RESPONSE_CACHE.get(exact_key)
+            if cached_output is not None:
+                activity.logger.info(f"{agent_name.capitalize()} agent answered from exact-match cache")
+                return cached_output
+
+        if fast_path is not None:
+            fast_output = await fast_path(input_data)
+            if fast_output is not None:
+                return fast_output
+
+        cache_key = None
+        if cache is not None:
+            # Only the request is embedded; the long context would swamp its wording. Purchase IDs,
+            # products, sizes and totals live in the context, so its identifiers must match exactly
+            cached_output, cache_key = await cache.lookup(
+                (
+                    input_data.customer_id,
+                    request_identifiers(request),
+                    request_identifiers(input_data.conversation_context),
+                    context_digest(input_data.conversation_context) if cache_per_context else None,
+                ),
+                request
+            )
+            if cached_output is not None:
+                return cached_output
+
+        # Set workflow context for user interaction tools
+        set_workflow_context(
+            ticket_workflow_id=input_data.ticket_workflow_id,
+            ticket_id=input_data.ticket_id,
+            agent_type=agent_type.name
+        )
+
+        all_tools = await get_agent_tools(agent_type, static_tools)
+        activity.logger.info(f"{agent_name.capitalize()} agent using {len(all_tools)} tools from MCP")
+
+        start_tool_call_scope()
+        result = None
+        if plan_first:
+            mcp_tools = [tool for tool in all_tools if id(tool) not in static_ids]
+            result = await plan_and_execute(signature, mcp_tools, react_inputs)
+            if result is None:
+                activity.logger.info(f"{agent_name.capitalize()} agent plan needs clarification, falling back to ReAct")
+
+        exhausted = False
+        if result is None:
+            react = get_react_module(signature, all_tools)
+            iterations = max_iters or react.max_iters
+            result = await react.acall(**react_inputs, max_iters=iterations)
+            exhausted = result.trajectory.get(f"tool_name_{iterations - 1}") not in (None, "finish")
+            if exhausted:
+                activity.logger.warning(f"{agent_name.capitalize()} agent hit {iterations} ReAct steps without finishing, escalating")
+
+        output = output_model(
+            **{
+                field_name: float(getattr(result, field_name)) if is_float else getattr(result, field_name)
+                for field_name, is_float in output_fields
+            },
+            llm_history=capture_llm_history(),
+            tool_results=getattr(result, 'tool_results', {})
+        )
+        if exhausted:
+            output.requires_escalation = True
+
+        if cacheable(output):
+            if cache is not None:
+                cache.store(cache_key, output)
+            if exact_key is not None:
+                _REACT_RESPONSE_CACHE[exact_key] = output
+
+        return output
+
+    run.__name__ = run.__qualname__ = name
+    run.__doc__ = f"{agent_name.capitalize()} agent using DSPy.React with its MCP tools"
+    # Temporal reads the payload types from the annotations
+    run.__annotations__ = {"input_data": input_model, "return": output_model}
+    return activity.defn(name=name)(run)
@@ -7,8 +7,6 @@ up-to-date information, particularly the latest chat_history.
 """
 
 from temporalio import activity
-from temporalio.client import Client
-import os
 from typing import Dict, Any, Optional
 import logging
 
@@ -27,12 +25,8 @@ async def query_parent_workflow_state(workflow_id: str) -> Optional[Dict[str, An
         Dictionary containing the workflow state, or None if query fails
     """
     try:
-        # Create Temporal client
-        temporal_address = os.getenv("TEMPORAL_ADDRESS", "localhost:7233")
-        client = await Client.connect(temporal_address)
-        
-        # Get workflow handle and query state
-        handle = client.get_workflow_handle(workflow_id)
+        # Query through the worker's client instead of opening a connection per call
+        handle = activity.client().get_workflow_handle(workflow_id)
         state_dict = await handle.query("getState")
         
         return state_dict
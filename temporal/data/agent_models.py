@@ -178,6 +178,8 @@ class OrchestratorInput:
     ticket_id: str
     ticket_workflow_id: str  # Main ticket workflow ID for real-time signaling
     available_agents: List[str]  # AgentType values that can be used
+    conversation_summary: str = ""  # Rolling summary of the oldest chat_history entries
+    summary_covers: int = 0  # Number of leading chat_history entries folded into conversation_summary
 
 @dataclass
 class AgentExecutionResult:
@@ -203,6 +205,8 @@ class OrchestratorOutput:
     requires_followup: bool
     followup_plan: Optional[ExecutionPlan] = None
     llm_history: str = ""
+    conversation_summary: str = ""
+    summary_covers: int = 0
 
 # ============================================================================
 # PURCHASE FLOW AGENT MODELS (NEW)
@@ -0,0 +1,18 @@
+"""Custom search attributes maintained by TicketWorkflow for visibility queries.
+
+These must be registered with the Temporal cluster before workers start, e.g.:
+
+    temporal server start-dev --search-attribute TicketStatus=Keyword --search-attribute CustomerId=Keyword \
+        --search-attribute LastActivityAt=Datetime
+"""
+
+from temporalio.common import SearchAttributeKey
+
+# Current TicketStatus value (e.g. "escalated_to_human")
+TICKET_STATUS = SearchAttributeKey.for_keyword("TicketStatus")
+
+# Customer owning the ticket, set when the ticket workflow is started
+CUSTOMER_ID = SearchAttributeKey.for_keyword("CustomerId")
+
+# Time of the last message or status change on the ticket, used by the auto-close sweep
+LAST_ACTIVITY_AT = SearchAttributeKey.for_datetime("LastActivityAt")
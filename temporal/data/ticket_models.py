@@ -93,4 +93,5 @@ class WorkflowPayload:
     ticket_id: str
     customer_id: str
     initial_message: str
-    customer_profile: Dict[str, Any]
\ No newline at end of file
+    customer_profile: Dict[str, Any]
+    warm_up_agent_caches: bool = False  # Prime the purchase-flow agents' prompt prefixes (GEMINI_CACHE_WARMUP)
\ No newline at end of file
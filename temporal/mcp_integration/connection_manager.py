@@ -29,6 +29,8 @@ class MCPConnectionManager:
         self._connections: Dict[str, MCPClient] = {}
         self._initialized = False
         self._lock = asyncio.Lock()
+        # Bumped whenever connections are (re)established or closed, so tool caches can tell
+        self._generation = 0
     
     async def initialize_connections(self):
         """
@@ -56,6 +58,7 @@ class MCPConnectionManager:
                     # Continue initialization even if one server fails
             
             self._initialized = True
+            self._generation += 1
             logger.info(f"Successfully connected to {len(self._connections)}/{len(MCP_SERVERS)} MCP servers")
     
     async def close_all_connections(self):
@@ -79,6 +82,7 @@ class MCPConnectionManager:
             
             self._connections.clear()
             self._initialized = False
+            self._generation += 1
             logger.info("All MCP connections closed")
     
     def get_client(self, server_name: str) -> Optional[MCPClient]:
@@ -168,6 +172,11 @@ class MCPConnectionManager:
         """Check if the connection manager is initialized."""
         return self._initialized
     
+    @property
+    def generation(self) -> int:
+        """Counter that changes every time connections are initialized or closed."""
+        return self._generation
+    
     @property
     def connected_servers(self) -> List[str]:
         """Get list of currently connected server names."""
@@ -1,6 +1,7 @@
 import asyncio
 import sys
 import os
+import weakref
 
 from temporalio.client import Client
 from temporalio.worker import Worker
@@ -11,7 +12,7 @@ from workflows.agents.order_specialist import OrderSpecialistAgent
 from workflows.agents.technical_specialist import TechnicalSpecialistAgent
 from workflows.agents.refund_specialist import RefundSpecialistAgent
 from workflows.agents.general_support import GeneralSupportAgent
-from workflows.agents.escalation_agent import EscalationAgent
+from workflows.agents.escalation_agent import EscalationAgent, EscalationBatchAgent
 from workflows.agents.response_synthesis_agent import ResponseSynthesisAgent
 from workflows.user_question_workflow import UserQuestionWorkflow
 from workflows.maintenance.auto_close_workflow import TicketAutoCloseWorkflow
@@ -28,7 +29,7 @@ from activities.order_activity import order_specialist_activity
 from activities.technical_activity import technical_specialist_activity
 from activities.refund_activity import refund_specialist_activity
 from activities.general_activity import general_support_activity
-from activities.escalation_activity import escalation_activity
+from activities.escalation_activity import escalation_activity, escalation_batch_activity
 from activities.response_synthesis_activity import response_synthesis_activity
 from activities.maintenance_activity import auto_close_inactive_tickets_activity
 
@@ -39,10 +40,16 @@ from activities.delivery_activity import delivery_activity
 from activities.alteration_activity import alteration_activity
 
 from activities.workflow_query_activity import query_parent_workflow_state
+from activities.conversation_summary_activity import summarize_conversation_activity
+from activities.cache_warmup_activity import warmup_agent_caches_activity
 
 import os
 import dspy
 from dotenv import load_dotenv
+
+from activities.lm_registry import GEMINI_MAX_CONCURRENCY, LM_FLASH
+from activities.utils import prebuild_react_modules
+from data.payload_converter import orjson_data_converter
 load_dotenv()
 
 # Import MCP connection manager
@@ -50,9 +57,61 @@ from mcp_integration import mcp_manager
 
 TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS")
 TASK_QUEUE = os.getenv("TASK_QUEUE")
+GEMINI_CONTEXT_CACHING = os.getenv("GEMINI_CONTEXT_CACHING", "false").lower() in ("1", "true", "yes")
+GEMINI_CONTEXT_CACHE_TTL = os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600s")
+
+
+class CachedJSONAdapter(dspy.JSONAdapter):
+    """JSONAdapter that renders the static parts of each signature's prompt once.
+
+    The system message (field descriptions, JSON structure, instructions with the ReAct
+    tool list) and the output requirements depend only on the signature, so they are
+    memoized per signature class; only the user message is rendered on every ReAct step.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rendered = weakref.WeakKeyDictionary()
+
+    def _memoized(self, signature, section, render):
+        sections = self._rendered.setdefault(signature, {})
+        if section not in sections:
+            sections[section] = render(signature)
+        return sections[section]
+
+    def format_field_description(self, signature):
+        return self._memoized(signature, "field_description", super().format_field_description)
+
+    def format_field_structure(self, signature):
+        return self._memoized(signature, "field_structure", super().format_field_structure)
+
+    def format_task_description(self, signature):
+        return self._memoized(signature, "task_description", super().format_task_description)
+
+    def user_message_output_requirements(self, signature):
+        return self._memoized(signature, "output_requirements", super().user_message_output_requirements)
+
 
 async def main():
-    dspy.configure(lm=dspy.LM("gemini/gemini-2.5-flash"))
+    # JSONAdapter asks Gemini for structured output directly, so a ReAct step is a single completion
+    # instead of a ChatAdapter attempt plus a JSONAdapter retry whenever the field markers don't parse
+    if GEMINI_CONTEXT_CACHING:
+        # litellm turns cache_control-marked system prompts (signature instructions + tool schemas)
+        # into Gemini CachedContent, so the static prefix isn't re-billed on every ReAct step.
+        # The TTL keeps one CachedContent per agent prompt alive across tickets instead of
+        # letting it lapse after Gemini's default lifetime.
+        LM_FLASH.kwargs["cache_control_injection_points"] = [{
+            "location": "message",
+            "role": "system",
+            "control": {"type": "ephemeral", "ttl": GEMINI_CONTEXT_CACHE_TTL},
+        }]
+    # async_max_workers only sizes the pool behind dspy.asyncify for sync-only modules;
+    # raise it so any such fallback doesn't queue behind the default 8 workers
+    dspy.configure(
+        lm=LM_FLASH,
+        adapter=CachedJSONAdapter(),
+        async_max_workers=GEMINI_MAX_CONCURRENCY,
+    )
     
     # Initialize MCP connections before starting worker
     print("Initializing MCP server connections...")
@@ -63,7 +122,10 @@ async def main():
         print(f"⚠ Warning: MCP initialization failed: {e}")
         print("Worker will continue with fallback to static tools")
     
-    client = await Client.connect(TEMPORAL_ADDRESS, namespace="default")
+    # Build every specialist's ReAct module now rather than on its first ticket
+    await prebuild_react_modules()
+    
+    client = await Client.connect(TEMPORAL_ADDRESS, namespace="default", data_converter=orjson_data_converter)
     worker = Worker(
         client,
         task_queue=TASK_QUEUE,
@@ -75,6 +137,7 @@ async def main():
             RefundSpecialistAgent,
             GeneralSupportAgent,
             EscalationAgent,
+            EscalationBatchAgent,
             ResponseSynthesisAgent,
             UserQuestionWorkflow,
             TicketAutoCloseWorkflow,
@@ -92,6 +155,7 @@ async def main():
             refund_specialist_activity,
             general_support_activity,
             escalation_activity,
+            escalation_batch_activity,
             response_synthesis_activity,
             auto_close_inactive_tickets_activity,
             male_specialist_activity,
@@ -99,9 +163,13 @@ async def main():
             billing_activity,
             delivery_activity,
             alteration_activity,
-            query_parent_workflow_state
+            query_parent_workflow_state,
+            summarize_conversation_activity,
+            warmup_agent_caches_activity
         ],
-        max_concurrent_activities=50,
+        # Every activity is async and runs on the event loop (no activity_executor needed);
+        # in-flight activities are bounded by Gemini concurrency, not by threads or CPUs
+        max_concurrent_activities=GEMINI_MAX_CONCURRENCY,
         max_concurrent_workflow_tasks=100
     )
     print("Starting multi-agent customer support worker...")
@@ -5,7 +5,7 @@ from temporalio import workflow
 from typing import Dict, List
 
 with workflow.unsafe.imports_passed_through():
-    from activities.escalation_activity import escalation_activity
+    from activities.escalation_activity import escalation_activity, escalation_batch_activity
     from data.agent_models import EscalationInput, EscalationOutput
 
 @workflow.defn
@@ -23,4 +23,17 @@ class EscalationAgent:
 
         workflow.upsert_memo({"llm-history": result.llm_history})
         
-        return result
\ No newline at end of file
+        return result
+
+
+@workflow.defn
+class EscalationBatchAgent:
+    @workflow.run
+    async def run(self, inputs: List[EscalationInput]) -> List[EscalationOutput]:
+        """Escalation review for many tickets at once (e.g. offline re-evaluation), batching LM calls"""
+        
+        return await workflow.execute_activity(
+            escalation_batch_activity,
+            inputs,
+            start_to_close_timeout=timedelta(minutes=10),
+        )
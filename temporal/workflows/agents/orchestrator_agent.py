@@ -1,5 +1,7 @@
 """Orchestrator Agent - Intelligent Multi-Agent Coordination Workflow"""
 
+import asyncio
+
 from temporalio import workflow
 from datetime import timedelta
 from typing import Dict, Any, List
@@ -19,6 +21,7 @@ with workflow.unsafe.imports_passed_through():
         orchestrator_synthesis_activity
     )
     from activities.workflow_query_activity import query_parent_workflow_state
+    from activities.conversation_summary_activity import summarize_conversation_activity
     # Import specialist workflows
     from workflows.agents.order_specialist import OrderSpecialistAgent
     from workflows.agents.technical_specialist import TechnicalSpecialistAgent
@@ -32,6 +35,8 @@ with workflow.unsafe.imports_passed_through():
     from workflows.agents.delivery import DeliveryAgent
     from workflows.agents.alteration import AlterationAgent
 
+# Most recent chat turns always passed to agents verbatim; older turns are folded into a summary
+RECENT_TURNS_VERBATIM = 8
 
 @workflow.defn
 class OrchestratorAgent:
@@ -67,6 +72,8 @@ class OrchestratorAgent:
             AgentType.DELIVERY: DeliveryAgent,
             AgentType.ALTERATION: AlterationAgent,
         }
+        self._conversation_summary = ""
+        self._summary_covers = 0
     
     @workflow.run
     async def run(self, input_data: OrchestratorInput) -> OrchestratorOutput:
@@ -84,6 +91,8 @@ class OrchestratorAgent:
             f"Orchestrator started for ticket {input_data.ticket_id}"
         )
         
+        await self._update_conversation_summary(input_data)
+        
         # ====================================================================
         # PHASE 1: PLANNING
         # ====================================================================
@@ -110,12 +119,13 @@ class OrchestratorAgent:
         # ====================================================================
         # PHASE 3: SYNTHESIS
         # ====================================================================
-        conversation_context = "\n".join(input_data.chat_history) if input_data.chat_history else ""
+        conversation_context = "\n".join(self._compact_history(input_data.chat_history)) if input_data.chat_history else ""
         orchestrator_output = await self._synthesize_response(
             input_data.customer_message,
             execution_plan,
             agent_results,
-            conversation_context
+            conversation_context,
+            input_data.ticket_workflow_id
         )
         
         workflow.logger.info(
@@ -125,8 +135,48 @@ class OrchestratorAgent:
         # Signal final synthesized response to parent ticket workflow
         await self._signal_final_response_to_parent(input_data, orchestrator_output)
         
+        # Hand the summary back so the ticket workflow only folds new turns next time
+        orchestrator_output.conversation_summary = self._conversation_summary
+        orchestrator_output.summary_covers = self._summary_covers
+        
         return orchestrator_output
     
+    async def _update_conversation_summary(self, input_data: OrchestratorInput) -> None:
+        """
+        Fold chat turns older than RECENT_TURNS_VERBATIM into the rolling summary.
+        
+        Runs once per orchestrator execution (i.e. once per customer turn), and only
+        once RECENT_TURNS_VERBATIM new turns have aged out, so every agent hand-off in
+        this run reuses the same summary instead of resending the full history.
+        """
+        self._conversation_summary = input_data.conversation_summary
+        self._summary_covers = input_data.summary_covers
+        if self._summary_covers > len(input_data.chat_history):
+            self._conversation_summary, self._summary_covers = "", 0
+        
+        if len(input_data.chat_history) - self._summary_covers <= 2 * RECENT_TURNS_VERBATIM:
+            return
+        # Runs started before summarization existed replay without the activity
+        if not workflow.patched("conversation-summary"):
+            return
+        
+        fold_to = len(input_data.chat_history) - RECENT_TURNS_VERBATIM
+        try:
+            self._conversation_summary = await workflow.execute_activity(
+                summarize_conversation_activity,
+                args=[self._conversation_summary, input_data.chat_history[self._summary_covers:fold_to]],
+                start_to_close_timeout=timedelta(minutes=1),
+            )
+            self._summary_covers = fold_to
+        except Exception as e:
+            workflow.logger.warning(f"Conversation summary failed: {e}. Keeping previous summary.")
+    
+    def _compact_history(self, chat_history: List[str]) -> List[str]:
+        """Replace the summarized prefix of chat_history with the rolling summary"""
+        if not self._summary_covers:
+            return chat_history
+        return [f"[summary of earlier conversation] {self._conversation_summary}"] + chat_history[self._summary_covers:]
+    
     async def _create_execution_plan(self, input_data: OrchestratorInput) -> ExecutionPlan:
         """
         Phase 1: Create intelligent execution plan using DSPy reasoning.
@@ -181,62 +231,89 @@ class OrchestratorAgent:
                 f"with {len(stage_steps)} agents: {[s.agent_type for s in stage_steps]}"
             )
             
-            # Within each stage, execute agents in parallel
-            stage_tasks = []
-            for step in stage_steps:
-                task = self._execute_single_agent(
-                    step,
-                    execution_context,
-                    input_data,
-                    execution_plan  # Pass execution plan to inform agents of downstream steps
-                )
-                stage_tasks.append((step, task))
-            
-            # Await all agents in this stage
-            for step, task in stage_tasks:
-                try:
-                    result = await task
+            if not workflow.patched("parallel-stages"):
+                # Runs started before stages ran in parallel replay their steps one at a time
+                for step in stage_steps:
+                    result = await self._run_stage_step(step, execution_context, input_data, execution_plan)
                     agent_results.append(result)
-                    
-                    # Add result to execution context for next stage
-                    execution_context[f"step_{step.step_number}"] = {
-                        "agent": step.agent_type,
-                        "response": result.response,
-                        "confidence": result.confidence,
-                        "tool_results": result.tool_results,
-                        "requires_escalation": result.requires_escalation,
-                        "full_output": result.metadata.get("full_specialist_output", {}),  # Pass full output to next agents
-                        "additional_info": self._extract_additional_info(result)  # Extract formatted additional_info
-                    }
-                    
-                    workflow.logger.info(
-                        f"Step {step.step_number} ({step.agent_type}) completed: "
-                        f"confidence={result.confidence:.2f}, "
-                        f"time={result.execution_time_ms}ms"
-                    )
-                    
-                    # Signal intermediate agent result to parent for real-time visibility
-                    await self._signal_agent_result_to_parent(input_data, result)
-                    
-                except Exception as e:
-                    workflow.logger.error(
-                        f"Step {step.step_number} ({step.agent_type}) failed: {e}"
-                    )
-                    # Create error result but continue with other agents
-                    error_result = AgentExecutionResult(
-                        step_number=step.step_number,
-                        agent_type=step.agent_type,
-                        response=f"Agent execution failed: {str(e)}",
-                        confidence=0.0,
-                        requires_escalation=True,
-                        execution_time_ms=0,
-                        tool_results={},
-                        metadata={"error": str(e)}
-                    )
-                    agent_results.append(error_result)
+                    self._record_step_result(execution_context, step, result)
+                continue
+            
+            # Within each stage, execute agents in parallel; the stage takes as long as its slowest agent
+            stage_results = await asyncio.gather(*(
+                self._run_stage_step(step, execution_context, input_data, execution_plan)
+                for step in stage_steps
+            ))
+            
+            # Add results to execution context for the next stage only, so agents of
+            # the same stage never see each other's partial output
+            for step, result in zip(stage_steps, stage_results):
+                agent_results.append(result)
+                self._record_step_result(execution_context, step, result)
         
         return agent_results
     
+    def _record_step_result(
+        self,
+        execution_context: Dict[str, Any],
+        step: ExecutionStep,
+        result: AgentExecutionResult
+    ) -> None:
+        """Add a successful step's result to the execution context passed to later agents."""
+        if "error" in result.metadata:
+            return
+        execution_context[f"step_{step.step_number}"] = {
+            "agent": step.agent_type,
+            "response": result.response,
+            "confidence": result.confidence,
+            "tool_results": result.tool_results,
+            "requires_escalation": result.requires_escalation,
+            "full_output": result.metadata.get("full_specialist_output", {}),  # Pass full output to next agents
+            "additional_info": self._extract_additional_info(result)  # Extract formatted additional_info
+        }
+    
+    async def _run_stage_step(
+        self,
+        step: ExecutionStep,
+        execution_context: Dict[str, Any],
+        input_data: OrchestratorInput,
+        execution_plan: ExecutionPlan
+    ) -> AgentExecutionResult:
+        """Execute one step of a stage, signal its result as soon as it is done, and turn failures into error results."""
+        try:
+            result = await self._execute_single_agent(
+                step,
+                execution_context,
+                input_data,
+                execution_plan  # Pass execution plan to inform agents of downstream steps
+            )
+            
+            workflow.logger.info(
+                f"Step {step.step_number} ({step.agent_type}) completed: "
+                f"confidence={result.confidence:.2f}, "
+                f"time={result.execution_time_ms}ms"
+            )
+            
+            # Signal intermediate agent result to parent for real-time visibility
+            await self._signal_agent_result_to_parent(input_data, result)
+            return result
+            
+        except Exception as e:
+            workflow.logger.error(
+                f"Step {step.step_number} ({step.agent_type}) failed: {e}"
+            )
+            # Create error result but continue with other agents
+            return AgentExecutionResult(
+                step_number=step.step_number,
+                agent_type=step.agent_type,
+                response=f"Agent execution failed: {str(e)}",
+                confidence=0.0,
+                requires_escalation=True,
+                execution_time_ms=0,
+                tool_results={},
+                metadata={"error": str(e)}
+            )
+    
     async def _execute_single_agent(
         self,
         step: ExecutionStep,
@@ -389,6 +466,7 @@ class OrchestratorAgent:
                 workflow.logger.warning(f"Failed to query parent workflow state: {e}. Using initial chat history.")
         
         # Add chat history if available
+        current_chat_history = self._compact_history(current_chat_history)
         if current_chat_history:
             conversation_parts.append("Previous conversation:")
             conversation_parts.extend(current_chat_history)
@@ -642,34 +720,29 @@ class OrchestratorAgent:
         stages = []
         remaining = steps.copy()
         completed_steps = set()
-        
-        max_iterations = len(steps) + 1  # Prevent infinite loop
-        iteration = 0
-        
-        while remaining and iteration < max_iterations:
-            iteration += 1
-            
-            # Find steps with no pending dependencies
-            current_stage = []
-            for step in remaining[:]:
-                if all(dep in completed_steps for dep in step.depends_on):
-                    current_stage.append(step)
-                    remaining.remove(step)
-                    completed_steps.add(step.step_number)
+        # Dependencies on steps that aren't in the plan can never be met; ignore them
+        planned_steps = {step.step_number for step in steps}
+        
+        while remaining:
+            # Find steps whose dependencies all ran in earlier stages (Kahn's algorithm, one level at a time)
+            current_stage = [
+                step for step in remaining
+                if all(dep in completed_steps or dep not in planned_steps for dep in step.depends_on)
+            ]
+            remaining = [step for step in remaining if step not in current_stage]
+            completed_steps.update(step.step_number for step in current_stage)
             
             if current_stage:
                 # Sort by priority within stage (lower priority number = higher priority)
                 current_stage.sort(key=lambda s: s.priority)
                 stages.append(current_stage)
             else:
-                # Circular dependency or error - log and add remaining as final stage
-                if remaining:
-                    workflow.logger.error(
-                        f"Circular dependency detected in remaining steps: "
-                        f"{[s.step_number for s in remaining]}"
-                    )
-                    # Add remaining as final stage to prevent infinite loop
-                    stages.append(remaining)
+                # Circular dependency - log and add remaining as final stage
+                workflow.logger.error(
+                    f"Circular dependency detected in remaining steps: "
+                    f"{[s.step_number for s in remaining]}"
+                )
+                stages.append(remaining)
                 break
         
         return stages
@@ -679,7 +752,8 @@ class OrchestratorAgent:
         customer_message: str,
         execution_plan: ExecutionPlan,
         agent_results: List[AgentExecutionResult],
-        conversation_context: str
+        conversation_context: str,
+        ticket_workflow_id: str
     ) -> OrchestratorOutput:
         """
         Phase 3: Synthesize agent outputs into coherent response.
@@ -693,7 +767,7 @@ class OrchestratorAgent:
         
         orchestrator_output = await workflow.execute_activity(
             orchestrator_synthesis_activity,
-            args=[customer_message, execution_plan, agent_results, conversation_context],
+            args=[customer_message, execution_plan, agent_results, conversation_context, ticket_workflow_id],
             start_to_close_timeout=timedelta(minutes=2),
         )
         
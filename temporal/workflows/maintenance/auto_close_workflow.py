@@ -31,6 +31,7 @@ class TicketAutoCloseWorkflow:
             activity_payload,
             start_to_close_timeout=timedelta(minutes=5),
             schedule_to_close_timeout=timedelta(minutes=5),
+            heartbeat_timeout=timedelta(minutes=1),
         )
 
         return result
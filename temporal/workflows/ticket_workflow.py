@@ -1,19 +1,24 @@
 from datetime import timedelta, datetime
 from temporalio import workflow
+from temporalio.common import RetryPolicy
 import asyncio
 from typing import Optional
 
 with workflow.unsafe.imports_passed_through():
     from data.base_models import TicketStatus, AgentType, UrgencyLevel, MessageType
     from data.ticket_models import TicketState, ChatMessage, WorkflowPayload
+    from data.search_attributes import LAST_ACTIVITY_AT, TICKET_STATUS
     from data.agent_models import OrchestratorInput, OrchestratorOutput
     from workflows.agents.orchestrator_agent import OrchestratorAgent
+    from activities.cache_warmup_activity import warmup_agent_caches_activity
 
 @workflow.defn
 class TicketWorkflow:
     def __init__(self) -> None:
         self._pending_queries: asyncio.Queue[ChatMessage] = asyncio.Queue()
         self._waiting_for_answer_workflow_id: Optional[str] = None  # Tracks which question workflow is waiting
+        self._response_draft: str = ""  # Partial synthesized response while it is being generated
+        self._cache_warmup: Optional[workflow.ActivityHandle] = None  # Best-effort prompt-cache warm-up
         self.state: TicketState | None = None
 
     @workflow.run
@@ -50,6 +55,17 @@ class TicketWorkflow:
 
         self.state.chat_history.append(first_msg)
         self._pending_queries.put_nowait(first_msg)
+        self._set_status(TicketStatus.OPEN)
+        self._mark_activity()
+
+        # Prime the purchase-flow agents' prompt prefixes while the first message is being planned
+        if ticket_details.warm_up_agent_caches and workflow.patched("agent-cache-warmup"):
+            self._cache_warmup = workflow.start_activity(
+                warmup_agent_caches_activity,
+                args=[ticket_details.customer_id, ticket_details.customer_profile],
+                start_to_close_timeout=timedelta(minutes=1),
+                retry_policy=RetryPolicy(maximum_attempts=1),
+            )
 
         workflow.logger.info(f"Starting agent-driven workflow for ticket {ticket_details.ticket_id}")
 
@@ -67,11 +83,27 @@ class TicketWorkflow:
                 if query.message_type == MessageType.CUSTOMER:
                     await self._process_with_orchestrator(query)
                     
-                self.state.last_updated = workflow.now()
+                self._mark_activity()
 
             if self.state.status in [TicketStatus.CLOSED, TicketStatus.RESOLVED]:
+                if self._cache_warmup and not self._cache_warmup.done():
+                    self._cache_warmup.cancel()
                 return f"Ticket {self.state.ticket_id} completed by agents."
 
+    def _set_status(self, status: TicketStatus) -> None:
+        """Update the ticket status and mirror it into the TicketStatus search attribute."""
+        self.state.status = status
+        # Tickets started before the search attribute existed replay without the upsert
+        if workflow.patched("ticket-status-search-attr"):
+            workflow.upsert_search_attributes([TICKET_STATUS.value_set(status.value)])
+
+    def _mark_activity(self) -> None:
+        """Record ticket activity and mirror it into the LastActivityAt search attribute."""
+        self.state.last_updated = workflow.now()
+        # Tickets started before the search attribute existed replay without the upsert
+        if workflow.patched("last-activity-search-attr"):
+            workflow.upsert_search_attributes([LAST_ACTIVITY_AT.value_set(self.state.last_updated)])
+
     async def _process_with_orchestrator(self, message: ChatMessage) -> None:
         """
         Enhanced orchestration pipeline using OrchestratorAgent.
@@ -101,6 +133,8 @@ class TicketWorkflow:
             customer_id=self.state.customer_id,
             ticket_id=self.state.ticket_id,
             ticket_workflow_id=ticket_workflow_id,
+            conversation_summary=self.state.context.get("conversation_summary", ""),
+            summary_covers=self.state.context.get("summary_covers", 0),
             available_agents=[
                 AgentType.ORDER_SPECIALIST.value,
                 AgentType.TECHNICAL_SPECIALIST.value,
@@ -128,17 +162,19 @@ class TicketWorkflow:
         )
         
         # Update state with orchestrator insights
-        self.state.status = TicketStatus.IN_PROGRESS
+        self._set_status(TicketStatus.IN_PROGRESS)
         self.state.context.update({
             "orchestrator_plan": orchestrator_result.execution_plan,
             "orchestrator_confidence": orchestrator_result.confidence,
-            "last_orchestrator_execution": workflow.now().isoformat()
+            "last_orchestrator_execution": workflow.now().isoformat(),
+            "conversation_summary": orchestrator_result.conversation_summary,
+            "summary_covers": orchestrator_result.summary_covers
         })
         
         # Handle escalation based on synthesis decision (synthesis evaluates all agent findings)
         if orchestrator_result.requires_escalation:
             workflow.logger.info("Orchestrator synthesis determined escalation needed")
-            self.state.status = TicketStatus.ESCALATED_TO_HUMAN
+            self._set_status(TicketStatus.ESCALATED_TO_HUMAN)
             self.state.context.update({
                 "escalation_reason": "Orchestrator determined human assistance needed",
                 "escalation_time": workflow.now().isoformat()
@@ -164,8 +200,8 @@ class TicketWorkflow:
     def updateTicketStatus(self, status: str) -> None:
         """Update the ticket status via signal."""
         if self.state:
-            self.state.status = TicketStatus(status)
-            self.state.last_updated = workflow.now()
+            self._set_status(TicketStatus(status))
+            self._mark_activity()
 
     @workflow.signal
     async def addMessage(self, msg: dict) -> None:
@@ -174,12 +210,14 @@ class TicketWorkflow:
             # Convert dict back to ChatMessage object
             chat_message = ChatMessage.from_dict(msg)
             self.state.chat_history.append(chat_message)
+            if chat_message.message_type == MessageType.AI_AGENT:
+                self._response_draft = ""
             
             # Skip processing for SYSTEM and AI_AGENT messages (orchestrator outputs)
             # These are already processed and just being logged
             if chat_message.message_type in [MessageType.SYSTEM, MessageType.AI_AGENT]:
                 workflow.logger.info(f"Received {chat_message.message_type.value} message, skipping processing")
-                self.state.last_updated = workflow.now()
+                self._mark_activity()
                 return
             
             # Check if we're waiting for an answer to a question
@@ -206,7 +244,7 @@ class TicketWorkflow:
                     # Resume normal status if no more pending questions
                     pending_count = sum(1 for q in self.state.pending_questions.values() if q.get("status") != "answered")
                     if pending_count == 0:
-                        self.state.status = TicketStatus.IN_PROGRESS
+                        self._set_status(TicketStatus.IN_PROGRESS)
                     
                     # Don't process this message further - it's an answer to a question
                     workflow.logger.info("Customer answer routed to question workflow, not processing as new query")
@@ -220,7 +258,7 @@ class TicketWorkflow:
                 # Normal customer message - process through orchestrator
                 self._pending_queries.put_nowait(chat_message)
             
-            self.state.last_updated = workflow.now()
+            self._mark_activity()
 
     @workflow.signal
     def display_agent_question(self, question_data: dict) -> None:
@@ -231,7 +269,7 @@ class TicketWorkflow:
             
             # Store question in state
             self.state.pending_questions[question_id] = question_data
-            self.state.status = TicketStatus.WAITING_FOR_CUSTOMER
+            self._set_status(TicketStatus.WAITING_FOR_CUSTOMER)
             
             # Set state: waiting for answer to this specific question workflow
             self._waiting_for_answer_workflow_id = question_workflow_id
@@ -247,11 +285,50 @@ class TicketWorkflow:
                 metadata=question_data  # Contains workflow_id for routing responses
             )
             self.state.chat_history.append(question_msg)
-            self.state.last_updated = workflow.now()
+            self._mark_activity()
             
             workflow.logger.info(f"Question {question_id} displayed in chat. Waiting for answer to workflow {question_workflow_id}")
 
+    @workflow.signal
+    def appendResponseDraft(self, offset: int, delta: str) -> None:
+        """Extend the partial synthesized response streamed by the synthesis activity.
+
+        ``delta`` replaces everything from ``offset`` on, so a retried synthesis (offset 0)
+        starts the draft over instead of appending to the failed attempt's text.
+        """
+        self._response_draft = self._response_draft[:offset] + delta
+
     @workflow.query
     def getState(self) -> dict | None:
         """Return the current state of the ticket as a serializable dict."""
         return self.state.to_dict() if self.state else None
+
+    @workflow.query
+    def getStateSince(self, message_count: int) -> dict | None:
+        """Return the ticket view state with only the chat messages after the first message_count."""
+        if not self.state:
+            return None
+        return {
+            "ticket_id": self.state.ticket_id,
+            "customer_id": self.state.customer_id,
+            "status": self.state.status.value,
+            "created_at": self.state.created_at.isoformat(),
+            "last_updated": self.state.last_updated.isoformat(),
+            "assigned_agent_type": self.state.assigned_agent_type.value if self.state.assigned_agent_type else None,
+            "pending_questions": self.state.pending_questions,
+            "message_count": len(self.state.chat_history),
+            "new_messages": [msg.to_dict() for msg in self.state.chat_history[message_count:]],
+            "response_draft": self._response_draft,
+        }
+
+    @workflow.query
+    def getSummary(self) -> dict | None:
+        """Return only the fields needed to list the ticket, without chat history."""
+        if not self.state:
+            return None
+        return {
+            "ticket_id": self.state.ticket_id,
+            "customer_id": self.state.customer_id,
+            "status": self.state.status.value,
+            "last_updated": self.state.last_updated.isoformat(),
+        }